@@ -2,7 +2,11 @@
 # Author: Maryia Mazurava
 
 
+# Value is native: int, bool, str or None for nil. Arguments are never changed,
+# so the parser shares one object among all equal arguments
 class Argument:
+    __slots__ = ("value", "arg_type")
+
     def __init__(self, arg_type, value):
         self.value = value
         self.arg_type = arg_type
@@ -0,0 +1,151 @@
+# File: batch.py
+# Author: Maryia Mazurava
+
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import contextlib
+import json
+import multiprocessing
+import os
+import signal
+import time
+import traceback
+from errors import *
+import errors as E
+from execution import Execution
+from output import Output
+
+MANIFEST_FILE = "manifest.json"
+
+# Program of the batch in the worker process, set once by init_worker
+worker_program = None
+
+
+# Raised by the timer signal when the run exceeds its time
+class RunTimeout(Exception):
+    pass
+
+
+def raise_timeout(signum, frame):
+    raise RunTimeout()
+
+
+# Reads the list of input files, one path per line
+def read_input_list(path):
+    try:
+        with open(path, "r") as file:
+            return [line.rstrip("\n") for line in file if line.strip() != ""]
+    except OSError:
+        E.error_exit("Error: can't read the batch list.\n", INPUT_ERROR)
+
+
+# Executes the program with one input file, stdout and stderr of the run go to their own files.
+# Every run gets a new Execution, so no interpreter state is shared between the runs.
+def run_one(program, number, input_path, output_dir, timeout=None, max_steps=None, max_call_depth=None):
+    name = f"{number:06d}"
+    stdout_path = os.path.join(output_dir, name + ".out")
+    stderr_path = os.path.join(output_dir, name + ".err")
+    start = time.perf_counter()
+    with open(stdout_path, "w") as stdout_file, open(stderr_path, "w") as stderr_file:
+        with contextlib.redirect_stderr(stderr_file):
+            exit_code = 0
+            try:
+                with open(input_path, "r") as input_file:
+                    output = Output(stdout_file)
+                    arguments = {'input': input_path, 'max_steps': max_steps, 'max_call_depth': max_call_depth}
+                    execution = Execution(program, arguments, input_file, output=output)
+                    if timeout is not None:
+                        signal.signal(signal.SIGALRM, raise_timeout)
+                        signal.setitimer(signal.ITIMER_REAL, timeout)
+                    try:
+                        execution.execute()
+                    finally:
+                        if timeout is not None:
+                            signal.setitimer(signal.ITIMER_REAL, 0)
+            except SystemExit as exit_status:
+                exit_code = exit_status.code if isinstance(exit_status.code, int) else 0 if exit_status.code is None else 1
+            except RunTimeout:
+                stderr_file.write(f"Error: run timed out after {timeout} s.\n")
+                exit_code = LIMIT_ERROR
+            except OSError:
+                stderr_file.write("Error: can't open the input file.\n")
+                exit_code = INPUT_ERROR
+            except Exception:
+                stderr_file.write(traceback.format_exc())
+                exit_code = INTERNAL_ERROR
+            finally:
+                E.output = None
+
+    return {
+        "input": input_path,
+        "stdout": stdout_path,
+        "stderr": stderr_path,
+        "exit_code": exit_code,
+        "time_s": round(time.perf_counter() - start, 6),
+    }
+
+
+def write_manifest(output_dir, source, runs):
+    exit_codes = {}
+    for run in runs:
+        exit_codes[str(run["exit_code"])] = exit_codes.get(str(run["exit_code"]), 0) + 1
+    manifest = {
+        "source": source,
+        "runs": runs,
+        "summary": {
+            "total": len(runs),
+            "succeeded": exit_codes.get("0", 0),
+            "exit_codes": exit_codes,
+            "time_s": round(sum(run["time_s"] for run in runs), 6),
+        },
+    }
+    try:
+        with open(os.path.join(output_dir, MANIFEST_FILE), "w") as file:
+            json.dump(manifest, file, indent=1)
+            file.write("\n")
+    except OSError:
+        E.error_exit("Error: can't write the batch manifest.\n", OUTPUT_ERROR)
+
+
+# Keeps the program in the worker, with fork it is inherited from the parent and never pickled
+def init_worker(program):
+    global worker_program
+    worker_program = program
+    # Interrupt of the batch is handled by the parent
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def run_task(task):
+    (number, input_path, output_dir, timeout, max_steps, max_call_depth) = task
+    return run_one(worker_program, number, input_path, output_dir, timeout, max_steps, max_call_depth)
+
+
+# Executes the runs in a pool of processes, results keep the order of the inputs
+def run_parallel(program, inputs, output_dir, jobs, timeout, max_steps, max_call_depth):
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    tasks = [(number, input_path, output_dir, timeout, max_steps, max_call_depth)
+             for (number, input_path) in enumerate(inputs, 1)]
+    try:
+        with ProcessPoolExecutor(jobs, mp_context=context, initializer=init_worker, initargs=(program,)) as pool:
+            return list(pool.map(run_task, tasks, chunksize=max(1, len(tasks) // (jobs * 8))))
+    except BrokenProcessPool:
+        E.error_exit("Error: batch worker process terminated.\n", INTERNAL_ERROR)
+
+
+# Runs the program once for every input file of the list and writes the manifest
+def run_batch(program, source, list_path, output_dir, jobs=1, timeout=None, max_steps=None, max_call_depth=None):
+    inputs = read_input_list(list_path)
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+    except OSError:
+        E.error_exit("Error: can't create the batch output directory.\n", OUTPUT_ERROR)
+
+    if jobs > 1 and len(inputs) > 1:
+        runs = run_parallel(program, inputs, output_dir, min(jobs, len(inputs)), timeout, max_steps, max_call_depth)
+    else:
+        runs = [run_one(program, number, input_path, output_dir, timeout, max_steps, max_call_depth)
+                for (number, input_path) in enumerate(inputs, 1)]
+    write_manifest(output_dir, source, runs)
+    return runs
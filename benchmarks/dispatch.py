@@ -0,0 +1,122 @@
+# File: benchmarks/dispatch.py
+# Author: Maryia Mazurava
+#
+# Micro-benchmark comparing the dispatch table of Execution with the former
+# match statement on a tight loop program.
+# Usage: python3 benchmarks/dispatch.py [iterations]
+
+
+import os
+import sys
+import io
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from compiler import Compiler
+from execution import Execution
+from parser import XMLParser
+import opcodes as O
+
+LOOP_PROGRAM = """<?xml version="1.0" encoding="UTF-8"?>
+<program language="IPPcode23">
+  <instruction order="1" opcode="DEFVAR"><arg1 type="var">GF@i</arg1></instruction>
+  <instruction order="2" opcode="DEFVAR"><arg1 type="var">GF@j</arg1></instruction>
+  <instruction order="3" opcode="MOVE"><arg1 type="var">GF@i</arg1><arg2 type="int">0</arg2></instruction>
+  <instruction order="4" opcode="LABEL"><arg1 type="label">loop</arg1></instruction>
+  <instruction order="5" opcode="MOVE"><arg1 type="var">GF@j</arg1><arg2 type="var">GF@i</arg2></instruction>
+  <instruction order="6" opcode="ADD"><arg1 type="var">GF@i</arg1><arg2 type="var">GF@j</arg2><arg3 type="int">1</arg3></instruction>
+  <instruction order="7" opcode="JUMPIFNEQ"><arg1 type="label">loop</arg1><arg2 type="var">GF@i</arg2><arg3 type="int">{iterations}</arg3></instruction>
+</program>
+"""
+
+
+# Execution with the match statement used before the dispatch table
+class MatchExecution(Execution):
+    def execute(self, current_order=0):
+        instructions = self.program.instructions
+        pc = current_order
+        while pc < len(instructions):
+            instruction = instructions[pc]
+            target = None
+            match instruction.opcode:
+                case O.MOVE:
+                    self.move_instruction(instruction)
+                case O.CREATEFRAME:
+                    self.createframe_instruction(instruction)
+                case O.PUSHFRAME:
+                    self.pushframe_instruction(instruction)
+                case O.POPFRAME:
+                    self.popframe_instruction(instruction)
+                case O.DEFVAR:
+                    self.defvar_instruction(instruction)
+                case O.ADD | O.MUL | O.SUB | O.IDIV:
+                    self.math_instruction(instruction)
+                case O.CONCAT:
+                    self.concat_instruction(instruction)
+                case O.WRITE:
+                    self.write_instruction(instruction)
+                case O.SETCHAR:
+                    self.setchar_instruction(instruction)
+                case O.STRLEN:
+                    self.strlen_instruction(instruction)
+                case O.STRI2INT:
+                    self.stri2int_instruction(instruction)
+                case O.INT2CHAR:
+                    self.int2char_instruction(instruction)
+                case O.GETCHAR:
+                    self.getchar_instruction(instruction)
+                case O.TYPE:
+                    self.type_instruction(instruction)
+                case O.EXIT:
+                    self.exit_instruction(instruction)
+                case O.DPRINT:
+                    self.dprint_instruction(instruction)
+                case O.BREAK:
+                    self.break_instruction(instruction)
+                case O.OR | O.AND | O.NOT:
+                    self.bool_instruction(instruction)
+                case O.LT | O.GT | O.EQ:
+                    self.relation_instruction(instruction)
+                case O.PUSHS:
+                    self.pushs_instruction(instruction)
+                case O.POPS:
+                    self.pops_instruction(instruction)
+                case O.READ:
+                    self.read_instruction(instruction)
+                case O.LABEL:
+                    self.label_instruction(instruction)
+                case O.CALL:
+                    target = self.call_instruction(instruction)
+                case O.JUMPIFEQ | O.JUMPIFNEQ:
+                    target = self.jump_condition_instruction(instruction)
+                case O.JUMP:
+                    target = self.jump_instruction(instruction)
+                case O.RETURN:
+                    target = self.return_instruction(instruction)
+
+            if target is None:
+                pc += 1
+            else:
+                pc = target
+
+
+def run(execution_class, program):
+    execution = execution_class(program, {'input': None}, None)
+    start = time.perf_counter()
+    execution.execute()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    source = io.BytesIO(LOOP_PROGRAM.format(iterations=iterations).encode())
+    program = Compiler().compile(XMLParser(source).parse())
+    executed = 3 + 4 * iterations
+
+    match_time = min(run(MatchExecution, program) for _ in range(3))
+    table_time = min(run(Execution, program) for _ in range(3))
+    print(f"instructions executed: {executed}")
+    print(f"match statement: {match_time:.3f} s ({executed / match_time:,.0f} instructions/s)")
+    print(f"dispatch table:  {table_time:.3f} s ({executed / table_time:,.0f} instructions/s)")
+    print(f"speedup: {match_time / table_time:.2f}x")
@@ -0,0 +1,69 @@
+# File: benchmarks/measure.py
+# Author: Maryia Mazurava
+#
+# Measures one program in a fresh process and prints the result as JSON,
+# used by benchmarks/run.py.
+# Usage: python3 benchmarks/measure.py program.xml [input file] [--no-fusion]
+
+
+import json
+import os
+import resource
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from compiler import Compiler
+from execution import Execution
+from fusion import fuse
+from output import Output
+from parser import XMLParser
+from stats import Stats
+
+
+def load(path):
+    compiler = Compiler()
+    with open(path, "rb") as source:
+        return compiler.link(XMLParser(source, compiler.compile_instruction).parse().instructions)
+
+
+def execute(program, input_path, stats=None):
+    input_file = open(input_path, "r") if input_path else None
+    with open(os.devnull, "w") as devnull:
+        execution = Execution(program, {'input': input_path}, input_file, output=Output(devnull), stats=stats)
+        try:
+            execution.execute()
+        except SystemExit:
+            pass
+    if input_file is not None:
+        input_file.close()
+
+
+if __name__ == '__main__':
+    fusion = '--no-fusion' not in sys.argv
+    arguments = [argument for argument in sys.argv[1:] if argument != '--no-fusion']
+    program_path = arguments[0]
+    input_path = arguments[1] if len(arguments) > 1 else None
+
+    start = time.perf_counter()
+    program = load(program_path)
+    parse_time = time.perf_counter() - start
+
+    # Executed as by interpret.py, statistics below count the source instructions
+    executed = fuse(program)[0] if fusion else program
+    start = time.perf_counter()
+    execute(executed, input_path)
+    execute_time = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Executed instructions are counted by a second, untimed run
+    stats = Stats(program, [])
+    execute(program, input_path, stats)
+
+    print(json.dumps({
+        "parse_s": parse_time,
+        "execute_s": execute_time,
+        "instructions": stats.executed_instructions(),
+        "peak_rss_kb": peak_rss,
+    }))
@@ -0,0 +1,112 @@
+# File: benchmarks/run.py
+# Author: Maryia Mazurava
+#
+# Runs the benchmark workloads and compares them with the stored baseline.
+# Usage: python3 benchmarks/run.py [--repeat=N] [--tolerance=0.1] [--save-baseline] [workload...]
+# Exit code is 1 when some workload is slower than the baseline by more than the tolerance
+# and by more than MIN_DELTA_S seconds, smaller differences are measurement noise.
+
+
+import json
+import os
+import platform
+import subprocess
+import sys
+
+from workloads import WORKLOADS, generate, program_path, input_path
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(BENCHMARKS_DIR, "baseline.json")
+MEASURE_SCRIPT = os.path.join(BENCHMARKS_DIR, "measure.py")
+# Slowdowns below this time are ignored, parse times of the small workloads are about 1 ms
+MIN_DELTA_S = 0.005
+
+
+# Best of the repeated measurements, every one in a new process
+def measure(name, repeat):
+    generate(name)
+    command = [sys.executable, MEASURE_SCRIPT, program_path(name)]
+    if WORKLOADS[name][1] is not None:
+        command.append(input_path(name))
+
+    results = []
+    for _ in range(repeat):
+        completed = subprocess.run(command, capture_output=True, text=True, check=True)
+        results.append(json.loads(completed.stdout))
+
+    best = {
+        "parse_s": min(result["parse_s"] for result in results),
+        "execute_s": min(result["execute_s"] for result in results),
+        "instructions": results[0]["instructions"],
+        "peak_rss_kb": max(result["peak_rss_kb"] for result in results),
+    }
+    best["instructions_per_s"] = best["instructions"] / best["execute_s"] if best["execute_s"] > 0 else 0
+    return best
+
+
+def change(current, baseline):
+    if not baseline:
+        return 0.0
+    return (current - baseline) / baseline
+
+
+# Slower by more than the tolerance and by more than the absolute floor
+def regressed(current, baseline, tolerance):
+    return change(current, baseline) > tolerance and current - baseline > MIN_DELTA_S
+
+
+def main(argv):
+    repeat = 3
+    tolerance = 0.1
+    save = False
+    names = []
+    for argument in argv:
+        if argument.startswith("--repeat="):
+            repeat = int(argument.split("=", 1)[1])
+        elif argument.startswith("--tolerance="):
+            tolerance = float(argument.split("=", 1)[1])
+        elif argument == "--save-baseline":
+            save = True
+        elif argument in WORKLOADS:
+            names.append(argument)
+        else:
+            sys.stderr.write(f"Unknown argument: {argument}\n")
+            return 2
+    names = names or list(WORKLOADS)
+
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE) as file:
+            baseline = json.load(file)["workloads"]
+
+    regressions = []
+    results = {}
+    print(f"{'workload':<18} {'parse s':>9} {'execute s':>10} {'instructions':>13} {'insts/s':>12} {'RSS MB':>8} {'vs baseline':>12}")
+    for name in names:
+        result = measure(name, repeat)
+        results[name] = result
+        compared = ""
+        if name in baseline:
+            # Positive change of the time is a slowdown
+            execute_change = change(result["execute_s"], baseline[name]["execute_s"])
+            compared = f"{execute_change:+.1%}"
+            if (regressed(result["parse_s"], baseline[name]["parse_s"], tolerance)
+                    or regressed(result["execute_s"], baseline[name]["execute_s"], tolerance)):
+                regressions.append(name)
+        print(f"{name:<18} {result['parse_s']:>9.3f} {result['execute_s']:>10.3f} {result['instructions']:>13} "
+              f"{result['instructions_per_s']:>12,.0f} {result['peak_rss_kb'] / 1024:>8.1f} {compared:>12}")
+
+    if save:
+        with open(BASELINE_FILE, "w") as file:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(), "workloads": results},
+                      file, indent=1, sort_keys=True)
+            file.write("\n")
+        print(f"Baseline saved to {BASELINE_FILE}")
+    elif regressions:
+        print(f"Slower than the baseline by more than {tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,258 @@
+# File: benchmarks/workloads.py
+# Author: Maryia Mazurava
+#
+# Generators of the IPPcode23 benchmark programs.
+# Usage: python3 benchmarks/workloads.py  (writes benchmarks/programs/)
+
+
+import os
+from xml.sax.saxutils import escape
+
+PROGRAMS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "programs")
+
+
+# Builds XML from instructions written as ("OPCODE", "type@value", ...)
+def to_xml(instructions):
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<program language="IPPcode23">']
+    for order, (opcode, *arguments) in enumerate(instructions, 1):
+        lines.append(f'  <instruction order="{order}" opcode="{opcode}">')
+        for number, argument in enumerate(arguments, 1):
+            if argument.startswith(("GF@", "LF@", "TF@")):
+                (arg_type, value) = ("var", argument)
+            else:
+                (arg_type, value) = argument.split("@", 1)
+            lines.append(f'    <arg{number} type="{arg_type}">{escape(value)}</arg{number}>')
+        lines.append('  </instruction>')
+    lines.append('</program>')
+    return "\n".join(lines) + "\n"
+
+
+def defvars(*names):
+    return [("DEFVAR", "GF@" + name) for name in names]
+
+
+# Integer arithmetic in a counting loop
+def arithmetic_loop(iterations=50000):
+    return defvars("i", "x", "y") + [
+        ("MOVE", "GF@i", "int@0"),
+        ("MOVE", "GF@x", "int@1"),
+        ("LABEL", "label@loop"),
+        ("MUL", "GF@y", "GF@i", "int@3"),
+        ("ADD", "GF@x", "GF@x", "GF@y"),
+        ("IDIV", "GF@x", "GF@x", "int@2"),
+        ("SUB", "GF@x", "GF@x", "int@1"),
+        ("ADD", "GF@i", "GF@i", "int@1"),
+        ("JUMPIFNEQ", "label@loop", "GF@i", f"int@{iterations}"),
+        ("WRITE", "GF@x"),
+    ]
+
+
+# Recursive fibonacci, arguments and results are passed on the data stack
+def fibonacci(n=18):
+    return defvars("n", "a", "b", "c", "t") + [
+        ("JUMP", "label@main"),
+        ("LABEL", "label@fib"),
+        ("POPS", "GF@n"),
+        ("LT", "GF@c", "GF@n", "int@2"),
+        ("JUMPIFEQ", "label@fib_base", "GF@c", "bool@true"),
+        ("PUSHS", "GF@n"),
+        ("SUB", "GF@t", "GF@n", "int@1"),
+        ("PUSHS", "GF@t"),
+        ("CALL", "label@fib"),
+        ("POPS", "GF@a"),
+        ("POPS", "GF@n"),
+        ("PUSHS", "GF@a"),
+        ("SUB", "GF@t", "GF@n", "int@2"),
+        ("PUSHS", "GF@t"),
+        ("CALL", "label@fib"),
+        ("POPS", "GF@a"),
+        ("POPS", "GF@b"),
+        ("ADD", "GF@a", "GF@a", "GF@b"),
+        ("PUSHS", "GF@a"),
+        ("RETURN",),
+        ("LABEL", "label@fib_base"),
+        ("PUSHS", "GF@n"),
+        ("RETURN",),
+        ("LABEL", "label@main"),
+        ("PUSHS", f"int@{n}"),
+        ("CALL", "label@fib"),
+        ("POPS", "GF@a"),
+        ("WRITE", "GF@a"),
+    ]
+
+
+# Recursive fibonacci with a new frame for every call, the local variables are read only
+# before the next CALL and the values are kept on the data stack across the calls
+def framed_fibonacci(n=16):
+    return defvars("a", "b") + [
+        ("JUMP", "label@main"),
+        ("LABEL", "label@fib"),
+        ("CREATEFRAME",),
+        ("DEFVAR", "TF@n"),
+        ("DEFVAR", "TF@c"),
+        ("PUSHFRAME",),
+        ("POPS", "LF@n"),
+        ("LT", "LF@c", "LF@n", "int@2"),
+        ("JUMPIFEQ", "label@fib_base", "LF@c", "bool@true"),
+        ("PUSHS", "LF@n"),
+        ("SUB", "LF@c", "LF@n", "int@1"),
+        ("PUSHS", "LF@c"),
+        ("CALL", "label@fib"),
+        ("POPS", "GF@a"),
+        ("POPS", "GF@b"),
+        ("PUSHS", "GF@a"),
+        ("SUB", "GF@b", "GF@b", "int@2"),
+        ("PUSHS", "GF@b"),
+        ("CALL", "label@fib"),
+        ("POPS", "GF@a"),
+        ("POPS", "GF@b"),
+        ("ADD", "GF@a", "GF@a", "GF@b"),
+        ("PUSHS", "GF@a"),
+        ("POPFRAME",),
+        ("RETURN",),
+        ("LABEL", "label@fib_base"),
+        ("PUSHS", "LF@n"),
+        ("POPFRAME",),
+        ("RETURN",),
+        ("LABEL", "label@main"),
+        ("PUSHS", f"int@{n}"),
+        ("CALL", "label@fib"),
+        ("POPS", "GF@a"),
+        ("WRITE", "GF@a"),
+    ]
+
+
+# Ackermann function A(m, n), arguments and results are passed on the data stack
+def ackermann(m=2, n=60):
+    return defvars("m", "n", "r") + [
+        ("JUMP", "label@main"),
+        ("LABEL", "label@ack"),
+        ("POPS", "GF@n"),
+        ("POPS", "GF@m"),
+        ("JUMPIFNEQ", "label@ack_m", "GF@m", "int@0"),
+        ("ADD", "GF@r", "GF@n", "int@1"),
+        ("PUSHS", "GF@r"),
+        ("RETURN",),
+        ("LABEL", "label@ack_m"),
+        ("JUMPIFNEQ", "label@ack_n", "GF@n", "int@0"),
+        ("SUB", "GF@r", "GF@m", "int@1"),
+        ("PUSHS", "GF@r"),
+        ("PUSHS", "int@1"),
+        ("CALL", "label@ack"),
+        ("RETURN",),
+        ("LABEL", "label@ack_n"),
+        ("SUB", "GF@r", "GF@m", "int@1"),
+        ("PUSHS", "GF@r"),
+        ("PUSHS", "GF@m"),
+        ("SUB", "GF@r", "GF@n", "int@1"),
+        ("PUSHS", "GF@r"),
+        ("CALL", "label@ack"),
+        ("CALL", "label@ack"),
+        ("RETURN",),
+        ("LABEL", "label@main"),
+        ("PUSHS", f"int@{m}"),
+        ("PUSHS", f"int@{n}"),
+        ("CALL", "label@ack"),
+        ("POPS", "GF@r"),
+        ("WRITE", "GF@r"),
+    ]
+
+
+# String building with CONCAT, GETCHAR and SETCHAR
+def string_building(iterations=5000):
+    return defvars("s", "c", "i", "l") + [
+        ("MOVE", "GF@s", "string@"),
+        ("MOVE", "GF@i", "int@0"),
+        ("LABEL", "label@loop"),
+        ("CONCAT", "GF@s", "GF@s", "string@ab"),
+        ("GETCHAR", "GF@c", "GF@s", "GF@i"),
+        ("SETCHAR", "GF@s", "GF@i", "string@x"),
+        ("ADD", "GF@i", "GF@i", "int@1"),
+        ("JUMPIFNEQ", "label@loop", "GF@i", f"int@{iterations}"),
+        ("STRLEN", "GF@l", "GF@s"),
+        ("WRITE", "GF@l"),
+    ]
+
+
+# Data stack traffic with PUSHS and POPS
+def stack_traffic(iterations=20000):
+    return defvars("i", "a", "b", "c") + [
+        ("MOVE", "GF@i", "int@0"),
+        ("LABEL", "label@loop"),
+        ("PUSHS", "GF@i"),
+        ("PUSHS", "int@7"),
+        ("PUSHS", "string@x"),
+        ("POPS", "GF@c"),
+        ("POPS", "GF@b"),
+        ("POPS", "GF@a"),
+        ("ADD", "GF@i", "GF@a", "int@1"),
+        ("JUMPIFNEQ", "label@loop", "GF@i", f"int@{iterations}"),
+        ("WRITE", "GF@i"),
+    ]
+
+
+# READ of every input line and WRITE of it back
+def input_output():
+    return defvars("x", "t") + [
+        ("LABEL", "label@loop"),
+        ("READ", "GF@x", "type@int"),
+        ("TYPE", "GF@t", "GF@x"),
+        ("JUMPIFEQ", "label@end", "GF@t", "string@nil"),
+        ("WRITE", "GF@x"),
+        ("WRITE", "string@\\010"),
+        ("JUMP", "label@loop"),
+        ("LABEL", "label@end"),
+    ]
+
+
+def input_output_input(lines=20000):
+    return "".join(f"{number}\n" for number in range(lines))
+
+
+# Large program without jumps
+def straight_line(size=50000):
+    instructions = defvars("x", "y")
+    instructions.append(("MOVE", "GF@y", "int@0"))
+    for number in range(size // 2):
+        instructions.append(("MOVE", "GF@x", f"int@{number}"))
+        instructions.append(("ADD", "GF@y", "GF@y", "GF@x"))
+    instructions.append(("WRITE", "GF@y"))
+    return instructions
+
+
+# name -> (program generator, input generator or None, shipped in the repository)
+WORKLOADS = {
+    "arithmetic_loop": (arithmetic_loop, None, True),
+    "fibonacci": (fibonacci, None, True),
+    "ackermann": (ackermann, None, True),
+    "framed_fibonacci": (framed_fibonacci, None, True),
+    "string_building": (string_building, None, True),
+    "stack_traffic": (stack_traffic, None, True),
+    "input_output": (input_output, input_output_input, True),
+    "straight_line": (straight_line, None, False),
+}
+
+
+def program_path(name):
+    return os.path.join(PROGRAMS_DIR, name + ".xml")
+
+
+def input_path(name):
+    return os.path.join(PROGRAMS_DIR, name + ".in")
+
+
+# Writes the program and its input, existing files are kept unless forced
+def generate(name, force=False):
+    (program, program_input, shipped) = WORKLOADS[name]
+    os.makedirs(PROGRAMS_DIR, exist_ok=True)
+    if force or not os.path.exists(program_path(name)):
+        with open(program_path(name), "w") as file:
+            file.write(to_xml(program()))
+    if program_input is not None and (force or not os.path.exists(input_path(name))):
+        with open(input_path(name), "w") as file:
+            file.write(program_input())
+
+
+if __name__ == '__main__':
+    for name in WORKLOADS:
+        generate(name, force=True)
@@ -0,0 +1,297 @@
+# File: binary.py
+# Author: Maryia Mazurava
+#
+# Binary form of the compiled program, loaded through mmap without parsing the instructions.
+#
+# All numbers are little-endian. The file starts with the header:
+#   magic       4 bytes  b"IPPB"
+#   version     uint32   FORMAT_VERSION
+#   11 x uint64 numbers of instructions, operands, jumps, constants, labels, strings,
+#               global names, local names and offsets of the instruction,
+#               operand and jump tables
+# followed by the sections, every one aligned to 8 bytes:
+#   instruction table  int64 x 4 per instruction: order, opcode, first operand, number of operands
+#   operand table      int64 x 3 per operand:
+#                        VAR_OPERAND    frame id, slot
+#                        CONST_OPERAND  constant index, 0
+#                        LABEL_OPERAND  string index of the name, index into the jump table
+#                        TYPE_OPERAND   string index of the type name, 0
+#   jump table         int64 per label operand: index of the LABEL instruction, for LABEL its own index
+#   string table       uint32 length + UTF-8 bytes per string, the strings are unique
+#   constant pool      uint32 type code + uint32 string index per constant, the value is in the text form
+#   label table        uint32 string index + uint32 index of the LABEL instruction per label
+#   global names       uint32 string index per slot of GF
+#   local names        uint32 string index per slot of TF and LF
+#
+# The instruction and operand tables are used directly from the mapped pages, so processes
+# running the same file share them and an instruction is decoded only when it is executed.
+# Every label operand is resolved, files with an undefined label are neither written nor loaded.
+# The jump table is small, so it is checked at load without touching the other tables.
+
+
+import mmap
+import struct
+import sys
+from array import array
+from errors import *
+import errors as E
+from compiler import VAR_OPERAND, CONST_OPERAND, LABEL_OPERAND, TYPE_OPERAND, READ_TYPES
+from instruction import CompiledInstruction
+from program import CompiledProgram
+from opcodes import *
+
+MAGIC = b"IPPB"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<4sI11Q")
+UINT32 = struct.Struct("<I")
+PAIR = struct.Struct("<II")
+INSTRUCTION_FIELDS = 4
+OPERAND_FIELDS = 3
+CONSTANT_TYPES = ["int", "bool", "string", "nil"]
+
+
+def is_binary(header):
+    return header[:len(MAGIC)] == MAGIC
+
+
+def align(size):
+    return (size + 7) & ~7
+
+
+# Text form of the constant stored in the string table
+def constant_text(const_type, value):
+    if const_type == "bool":
+        return "true" if value else "false"
+    if const_type == "nil":
+        return ""
+    return str(value)
+
+
+def constant_value(const_type, text):
+    if const_type == "int":
+        return int(text)
+    if const_type == "bool":
+        return text == "true"
+    if const_type == "nil":
+        return None
+    return text
+
+
+# Serializes the compiled program to the bytes of the binary format
+def dump(program: CompiledProgram):
+    strings = {}
+    constants = {}
+    labels = []
+    instruction_table = array("q")
+    operand_table = array("q")
+    jump_table = array("q")
+
+    def string(text):
+        return strings.setdefault(text, len(strings))
+
+    for (index, instruction) in enumerate(program.instructions):
+        instruction_table.extend((instruction.order, instruction.opcode,
+                                  len(operand_table) // OPERAND_FIELDS, len(instruction.operands)))
+        if instruction.opcode == LABEL:
+            labels.append((string(instruction.operands[0][1]), index))
+        for operand in instruction.operands:
+            kind = operand[0]
+            if kind == VAR_OPERAND:
+                operand_table.extend((kind, operand[1], operand[2]))
+            elif kind == CONST_OPERAND:
+                key = (operand[1], string(constant_text(operand[1], operand[2])))
+                operand_table.extend((kind, constants.setdefault(key, len(constants)), 0))
+            elif kind == LABEL_OPERAND:
+                if instruction.opcode == LABEL:
+                    target = index
+                elif operand[2] is None:
+                    E.error_exit("Error: label doesn't exist.\n", SEMANTIC_ERROR)
+                else:
+                    target = operand[2]
+                operand_table.extend((kind, string(operand[1]), len(jump_table)))
+                jump_table.append(target)
+            else:
+                operand_table.extend((kind, string(operand[1]), 0))
+
+    global_names = [string(name) for name in program.global_names]
+    local_names = [string(name) for name in program.local_names]
+    if sys.byteorder != "little":
+        instruction_table.byteswap()
+        operand_table.byteswap()
+        jump_table.byteswap()
+
+    tail = bytearray()
+    for text in strings:
+        encoded = text.encode("utf-8")
+        tail += UINT32.pack(len(encoded)) + encoded
+    for (const_type, text_index) in constants:
+        tail += PAIR.pack(CONSTANT_TYPES.index(const_type), text_index)
+    for (name_index, target) in labels:
+        tail += PAIR.pack(name_index, target)
+    for name_index in global_names + local_names:
+        tail += UINT32.pack(name_index)
+
+    instructions_offset = align(HEADER.size)
+    operands_offset = align(instructions_offset + len(instruction_table) * 8)
+    jumps_offset = align(operands_offset + len(operand_table) * 8)
+    tail_offset = align(jumps_offset + len(jump_table) * 8)
+    data = bytearray(tail_offset + len(tail))
+    HEADER.pack_into(data, 0, MAGIC, FORMAT_VERSION, len(program.instructions), len(operand_table) // OPERAND_FIELDS,
+                     len(jump_table), len(constants), len(labels), len(strings), len(global_names), len(local_names),
+                     instructions_offset, operands_offset, jumps_offset)
+    data[instructions_offset:instructions_offset + len(instruction_table) * 8] = instruction_table.tobytes()
+    data[operands_offset:operands_offset + len(operand_table) * 8] = operand_table.tobytes()
+    data[jumps_offset:jumps_offset + len(jump_table) * 8] = jump_table.tobytes()
+    data[tail_offset:] = tail
+    return bytes(data)
+
+
+def damaged():
+    E.error_exit("Error: damaged binary program.\n", FORMAT_ERROR)
+
+
+# Instructions decoded on the first access from the mapped instruction and operand tables.
+# Every decoded instruction is checked against the signature of its opcode and the sizes
+# of the tables, so a damaged file ends with FORMAT_ERROR and not inside the execution.
+class MappedInstructions(dict):
+    def __init__(self, count, instruction_table, operand_table, jump_table, strings, constants, global_count,
+                 local_count):
+        super().__init__()
+        self.count = count
+        self.instruction_table = instruction_table
+        self.operand_table = operand_table
+        self.operand_count = len(operand_table) // OPERAND_FIELDS
+        # Targets are checked by check_jumps at load
+        self.jump_table = jump_table
+        self.strings = strings
+        self.constants = constants
+        # Number of the slots indexed by the frame id
+        self.frame_sizes = (global_count, local_count, local_count)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self[index]
+
+    def __missing__(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        table = self.instruction_table
+        base = index * INSTRUCTION_FIELDS
+        (order, opcode, first, number) = table[base:base + INSTRUCTION_FIELDS]
+        if not 0 <= opcode < len(NAMES) or number != len(SIGNATURES[opcode]):
+            damaged()
+        if first < 0 or first + number > self.operand_count:
+            damaged()
+
+        operands = []
+        for (expected, position) in zip(SIGNATURES[opcode], range(first * OPERAND_FIELDS,
+                                                                   (first + number) * OPERAND_FIELDS, OPERAND_FIELDS)):
+            (kind, first_value, second_value) = self.operand_table[position:position + OPERAND_FIELDS]
+            if kind == VAR_OPERAND and expected in (VAR, SYMB):
+                if not 0 <= first_value < len(self.frame_sizes) or not 0 <= second_value < self.frame_sizes[first_value]:
+                    damaged()
+                operands.append((VAR_OPERAND, first_value, second_value))
+            elif kind == CONST_OPERAND and expected == SYMB:
+                if not 0 <= first_value < len(self.constants):
+                    damaged()
+                operands.append(self.constants[first_value])
+            elif kind == LABEL_OPERAND and expected == LABEL_NAME:
+                if not 0 <= first_value < len(self.strings) or not 0 <= second_value < len(self.jump_table):
+                    damaged()
+                target = None if opcode == LABEL else self.jump_table[second_value]
+                operands.append((LABEL_OPERAND, self.strings[first_value], target))
+            elif kind == TYPE_OPERAND and expected == TYPE_NAME:
+                if not 0 <= first_value < len(self.strings) or self.strings[first_value] not in READ_TYPES:
+                    damaged()
+                operands.append((TYPE_OPERAND, self.strings[first_value]))
+            else:
+                damaged()
+
+        instruction = CompiledInstruction(order, opcode, tuple(operands))
+        instruction.index = index
+        self[index] = instruction
+        return instruction
+
+
+# Rejects the undefined label before the execution, only it has the target -1
+def check_jumps(jump_table, instruction_count):
+    if len(jump_table) == 0:
+        return
+    if -1 in jump_table:
+        E.error_exit("Error: label doesn't exist.\n", SEMANTIC_ERROR)
+    if min(jump_table) < 0 or max(jump_table) >= instruction_count:
+        damaged()
+
+
+# Loads the program from the buffer, mapped file or bytes of the binary format
+def load(buffer):
+    view = memoryview(buffer)
+    try:
+        (magic, version, instruction_count, operand_count, jump_count, constant_count, label_count, string_count,
+         global_count, local_count, instructions_offset, operands_offset, jumps_offset) = HEADER.unpack_from(view, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            E.error_exit("Error: unsupported binary format.\n", FORMAT_ERROR)
+
+        instruction_end = instructions_offset + instruction_count * INSTRUCTION_FIELDS * 8
+        operand_end = operands_offset + operand_count * OPERAND_FIELDS * 8
+        jump_end = jumps_offset + jump_count * 8
+        instruction_table = view[instructions_offset:instruction_end].cast("q")
+        operand_table = view[operands_offset:operand_end].cast("q")
+        jump_table = view[jumps_offset:jump_end].cast("q")
+        # Tables cut off by the end of the file
+        if (len(instruction_table) != instruction_count * INSTRUCTION_FIELDS
+                or len(operand_table) != operand_count * OPERAND_FIELDS or len(jump_table) != jump_count):
+            damaged()
+        if sys.byteorder != "little":
+            instruction_table = array("q", instruction_table)
+            instruction_table.byteswap()
+            operand_table = array("q", operand_table)
+            operand_table.byteswap()
+            jump_table = array("q", jump_table)
+            jump_table.byteswap()
+        check_jumps(jump_table, instruction_count)
+
+        position = align(jump_end)
+        strings = []
+        for _ in range(string_count):
+            (length,) = UINT32.unpack_from(view, position)
+            strings.append(str(view[position + 4:position + 4 + length], "utf-8"))
+            position += 4 + length
+
+        constants = []
+        for _ in range(constant_count):
+            (type_code, text_index) = PAIR.unpack_from(view, position)
+            const_type = CONSTANT_TYPES[type_code]
+            constants.append((CONST_OPERAND, const_type, constant_value(const_type, strings[text_index])))
+            position += PAIR.size
+
+        # Labels are already resolved in the operands, the table serves other tools
+        position += label_count * PAIR.size
+        names = [strings[UINT32.unpack_from(view, position + 4 * number)[0]]
+                 for number in range(global_count + local_count)]
+    except (struct.error, IndexError, ValueError, TypeError):
+        damaged()
+
+    instructions = MappedInstructions(instruction_count, instruction_table, operand_table, jump_table, strings,
+                                      constants, global_count, local_count)
+    return CompiledProgram(instructions, names[:global_count], names[global_count:])
+
+
+# Maps the file into memory, streams which can't be mapped (pipes) are read
+def load_file(file):
+    try:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return load(file.read())
+    return load(mapped)
+
+
+def write_file(program: CompiledProgram, path):
+    try:
+        with open(path, "wb") as file:
+            file.write(dump(program))
+    except OSError:
+        E.error_exit("Error: can't write the binary program.\n", OUTPUT_ERROR)
@@ -0,0 +1,113 @@
+# File: cache.py
+# Author: Maryia Mazurava
+
+
+import hashlib
+import io
+import os
+import pickle
+import tempfile
+
+CACHE_SUFFIX = ".ippc"
+DEFAULT_LIMIT = 256 * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+# Modules which determine the compiled form, any change of them invalidates the cache
+VERSION_MODULES = ["compiler.py", "instruction.py", "opcodes.py", "parser.py", "program.py", "reader.py", "cache.py"]
+
+
+# Fingerprint of the interpreter version, cached programs of other versions never match
+def interpreter_version():
+    digest = hashlib.sha256(pickle.format_version.encode())
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for module in VERSION_MODULES:
+        with open(os.path.join(directory, module), "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+# On-disk cache of compiled programs keyed by the hash of the XML source,
+# the least recently used programs are removed when the size limit is exceeded
+class ProgramCache:
+    def __init__(self, directory, limit=DEFAULT_LIMIT):
+        self.directory = directory
+        self.limit = limit
+        self.version = interpreter_version()
+        os.makedirs(directory, exist_ok=True)
+
+    # Hashes the source, returns the key and the source rewound for the parser
+    def key(self, source):
+        digest = hashlib.sha256(self.version.encode())
+        seekable = source.seekable()
+        chunks = []
+        while True:
+            chunk = source.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            if not seekable:
+                chunks.append(chunk)
+
+        if seekable:
+            source.seek(0)
+        else:
+            source = io.BytesIO(b"".join(chunks))
+        return digest.hexdigest(), source
+
+    def path(self, key):
+        return os.path.join(self.directory, key + CACHE_SUFFIX)
+
+    # Returns the cached program or None, damaged entries are removed
+    def load(self, key):
+        path = self.path(key)
+        try:
+            with open(path, "rb") as file:
+                program = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            self.remove(path)
+            return None
+
+        # Access time for the eviction is kept in the modification time
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return program
+
+    def store(self, key, program):
+        try:
+            (handle, temporary) = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(handle, "wb") as file:
+                pickle.dump(program, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, self.path(key))
+        except OSError:
+            return
+        self.evict()
+
+    # Removes the least recently used programs until the cache fits the limit
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(CACHE_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                status = os.stat(path)
+            except OSError:
+                continue
+            entries.append((status.st_mtime, status.st_size, path))
+
+        total = sum(size for (modified, size, path) in entries)
+        for (modified, size, path) in sorted(entries):
+            if total <= self.limit:
+                break
+            self.remove(path)
+            total -= size
+
+    @staticmethod
+    def remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
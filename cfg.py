@@ -0,0 +1,85 @@
+# File: cfg.py
+# Author: Maryia Mazurava
+
+
+from program import CompiledProgram
+from opcodes import *
+
+START_BLOCK = "<start>"
+
+# Instructions ending the basic block
+END_OPCODES = JUMP_OPCODES + (RETURN, EXIT)
+
+
+# Class representing sequence of instructions from start up to end (exclusive) entered only by the first one
+class BasicBlock:
+    def __init__(self, number, start, end, name):
+        self.number = number
+        self.start = start
+        self.end = end
+        self.name = name
+        # Numbers of the blocks
+        self.successors = []
+        self.predecessors = []
+
+
+# Class representing the control-flow graph of the compiled program, labels must be resolved.
+# CALL has edges to the function and to the instruction after it, where RETURN continues.
+# RETURN and EXIT have no successors.
+class ControlFlowGraph:
+    def __init__(self, program: CompiledProgram):
+        self.program = program
+        self.blocks = []
+        # Number of the block of every instruction
+        self.block_of = []
+        self.build()
+
+    # Splits the program to the blocks and connects them
+    def build(self):
+        instructions = self.program.instructions
+        count = len(instructions)
+        leaders = {0} if count > 0 else set()
+        for (index, instruction) in enumerate(instructions):
+            if instruction.opcode == LABEL:
+                leaders.add(index)
+            elif instruction.opcode in END_OPCODES and index + 1 < count:
+                leaders.add(index + 1)
+
+        starts = sorted(leaders)
+        label = START_BLOCK
+        label_start = 0
+        for (number, start) in enumerate(starts):
+            end = starts[number + 1] if number + 1 < len(starts) else count
+            if instructions[start].opcode == LABEL:
+                (label, label_start) = (instructions[start].operands[0][1], start)
+                name = label
+            else:
+                # Block without label is named by the position after the last label
+                name = label if start == label_start else f"{label}+{start - label_start}"
+            self.blocks.append(BasicBlock(number, start, end, name))
+            self.block_of.extend([number] * (end - start))
+
+        for block in self.blocks:
+            last = instructions[block.end - 1]
+            if last.opcode in JUMP_OPCODES:
+                self.connect(block, self.block_of[last.operands[0][2]])
+            if last.opcode not in (JUMP, RETURN, EXIT) and block.end < count:
+                self.connect(block, self.block_of[block.end])
+
+    def connect(self, block, number):
+        if number not in block.successors:
+            block.successors.append(number)
+            self.blocks[number].predecessors.append(block.number)
+
+    # Numbers of the blocks reachable from the start of the program
+    def reachable(self):
+        if not self.blocks:
+            return set()
+        visited = {0}
+        pending = [0]
+        while pending:
+            for successor in self.blocks[pending.pop()].successors:
+                if successor not in visited:
+                    visited.add(successor)
+                    pending.append(successor)
+        return visited
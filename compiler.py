@@ -0,0 +1,122 @@
+# File: compiler.py
+# Author: Maryia Mazurava
+
+
+from errors import *
+import errors as E
+from instruction import Instruction, CompiledInstruction
+from program import Program, CompiledProgram
+from opcodes import *
+
+GF_FRAME = 0
+LF_FRAME = 1
+TF_FRAME = 2
+FRAME_IDS = {"GF": GF_FRAME, "LF": LF_FRAME, "TF": TF_FRAME}
+
+# Kinds of the compiled operands, first item of the operand tuple
+VAR_OPERAND = 0
+CONST_OPERAND = 1
+LABEL_OPERAND = 2
+TYPE_OPERAND = 3
+
+LITERAL_TYPES = ["int", "bool", "string", "nil"]
+READ_TYPES = ["int", "bool", "string"]
+
+
+# Class translating parsed program into pre-validated instructions for the execution.
+# Operands are tuples:
+#   (VAR_OPERAND, frame id, variable slot)
+#   (CONST_OPERAND, type, value)
+#   (LABEL_OPERAND, label name, index of the LABEL instruction)
+#   (TYPE_OPERAND, type name)
+class Compiler:
+    def __init__(self):
+        # Global frame has its own slots, temporary and local frames share them
+        self.global_slots = {}
+        self.global_names = []
+        self.local_slots = {}
+        self.local_names = []
+        # Equal operands are compiled to one shared tuple
+        self.operands = {}
+
+    # Compiles the whole program
+    def compile(self, program: Program):
+        instructions = [self.compile_instruction(instruction) for instruction in program.instructions]
+        return self.link(instructions)
+
+    # Resolves label operands to the indices of the LABEL instructions, undefined labels are
+    # rejected before the execution
+    def link(self, instructions):
+        targets = {}
+        for index, instruction in enumerate(instructions):
+            if instruction.opcode == LABEL:
+                targets[instruction.operands[0][1]] = index
+
+        for index, instruction in enumerate(instructions):
+            instruction.index = index
+            if instruction.opcode in JUMP_OPCODES:
+                name = instruction.operands[0][1]
+                if name not in targets:
+                    E.error_exit("Error: label doesn't exist.\n", SEMANTIC_ERROR)
+                instruction.operands = ((LABEL_OPERAND, name, targets[name]),) + instruction.operands[1:]
+
+        return CompiledProgram(instructions, self.global_names, self.local_names)
+
+    # Checks the arguments of one instruction and converts them to operands
+    def compile_instruction(self, instruction: Instruction):
+        opcode = IDS[instruction.opcode]
+        signature = SIGNATURES[opcode]
+        if len(instruction.arguments) != len(signature):
+            E.error_exit("Error: wrong number of arguments.\n", STRUCTURE_ERROR)
+
+        operands = tuple(self.compile_operand(kind, argument)
+                         for kind, argument in zip(signature, instruction.arguments))
+        return CompiledInstruction(instruction.order, opcode, operands)
+
+    def compile_operand(self, kind, argument):
+        if kind == VAR:
+            if argument.arg_type != "var":
+                E.error_exit("Error: wrong type of argument.\n", STRUCTURE_ERROR)
+            return self.compile_variable(argument.value)
+
+        if kind == SYMB:
+            if argument.arg_type == "var":
+                return self.compile_variable(argument.value)
+            if argument.arg_type not in LITERAL_TYPES:
+                E.error_exit("Error: wrong type of argument.\n", STRUCTURE_ERROR)
+            operand = (CONST_OPERAND, argument.arg_type, argument.value)
+            return self.operands.setdefault(operand, operand)
+
+        if kind == LABEL_NAME:
+            if argument.arg_type != "label":
+                E.error_exit("Error: wrong argument type.\n", STRUCTURE_ERROR)
+            return LABEL_OPERAND, argument.value, None
+
+        if argument.arg_type != "type":
+            E.error_exit("Error: wrong type of argument.\n", STRUCTURE_ERROR)
+        if argument.value not in READ_TYPES:
+            E.error_exit("Error: wrong value of type.\n", WRONG_VALUE_ERROR)
+        return TYPE_OPERAND, argument.value
+
+    # Splits 'frame@name' once and gives every variable name its own slot in the frame
+    def compile_variable(self, name):
+        if name is None:
+            E.error_exit("Error: invalid variable name.\n", STRUCTURE_ERROR)
+        frame_name, separator, var_name = name.partition("@")
+        if frame_name not in FRAME_IDS or var_name == "":
+            E.error_exit("Error: invalid variable name.\n", STRUCTURE_ERROR)
+
+        frame_id = FRAME_IDS[frame_name]
+        if frame_id == GF_FRAME:
+            slots, names = self.global_slots, self.global_names
+        else:
+            slots, names = self.local_slots, self.local_names
+
+        slot = slots.get(var_name)
+        if slot is None:
+            slot = len(names)
+            slots[var_name] = slot
+            names.append(var_name)
+
+        operand = (VAR_OPERAND, frame_id, slot)
+        return self.operands.setdefault(operand, operand)
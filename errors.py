@@ -16,8 +16,29 @@ FRAME_ERROR = 55
 NO_VALUE_ERROR = 56
 WRONG_VALUE_ERROR = 57
 STRING_ERROR = 58
+LIMIT_ERROR = 60
+INTERNAL_ERROR = 99
+
+# Buffered output of the running program, written out before the error message
+output = None
+
+# While set, error_exit raises DeferredError instead of exiting, so the caller can keep reading the input
+deferred = False
+
+
+# Error recorded by error_exit while the exit is deferred
+class DeferredError(Exception):
+    def __init__(self, message: str, error: int):
+        super().__init__(message)
+        self.message = message
+        self.error = error
+
 
 # Prints error message to stderr and exits the program with the code
 def error_exit(message: str, error: int):
+    if deferred:
+        raise DeferredError(message, error)
+    if output is not None:
+        output.flush()
     sys.stderr.write(message)
     exit(error)
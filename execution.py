@@ -2,203 +2,360 @@
 # Author: Maryia Mazurava
 
 
-from program import Program
-from var import Variable
+from program import CompiledProgram
+from var import Variable, StringBuilder
+from frame import UNDEFINED, new_frame, defined_variables, LocalFrame
+from output import Output
+from reader import InputReader
+from stack import FrameStack, CallStack, MAX_DEPTH
 from errors import *
 import errors as E
+from opcodes import *
+from compiler import GF_FRAME, LF_FRAME, TF_FRAME, VAR_OPERAND
+from itertools import repeat
 import sys
+import time
 
-GF_FRAME_NAME = 'GF'
-TF_FRAME_NAME = 'TF'
-LF_FRAME_NAME = "LF"
-VAR_ARG_TYPE = "var"
 INT_ARG_TYPE = "int"
 STRING_ARG_TYPE = "string"
 NIL_ARG_TYPE = "nil"
 BOOL_ARG_TYPE = "bool"
-TYPE_ARG_TYPE = "type"
-LABEL_ARG_TYPE = "label"
+
+
+# Converts the value to its IPPcode23 text form, used only for the output
+def to_text(value_type, value):
+    if value_type == BOOL_ARG_TYPE:
+        return "true" if value else "false"
+    if value_type == NIL_ARG_TYPE:
+        return ""
+    return str(value)
+
+
+# IPPcode23 type of the native value on the data stack
+VALUE_TYPES = {int: INT_ARG_TYPE, bool: BOOL_ARG_TYPE, str: STRING_ARG_TYPE, type(None): NIL_ARG_TYPE}
+
+# Limits are checked once per this number of executed instructions
+LIMIT_CHECK_INTERVAL = 1024
+
+
+# Instructions storing the result to the variable given as the first operand
+WRITING_OPCODES = frozenset(opcode for opcode, signature in SIGNATURES.items()
+                            if signature and signature[0] == VAR and opcode != DEFVAR)
+
 
 # Class representing execution of the program
 class Execution:
-    data_stack = []
-    call_stack = []
-    frames = {
-        GF_FRAME_NAME: {},
-        LF_FRAME_NAME: [],
-        TF_FRAME_NAME: None
-    }
-
-    def __init__(self, program: Program, args, input_file):
+    def __init__(self, program: CompiledProgram, args, input_file, output=None, stats=None, profiler=None):
         self.program = program
         self.args = args
         self.input_file = input_file
-
-    # TODO CURRENT_ORDER
+        self.output = Output() if output is None else output
+        E.output = self.output
+        self.interactive_input = args['input'] is None and sys.stdin.isatty()
+        self.reader = InputReader(sys.stdin if args['input'] is None else input_file, self.interactive_input)
+        # Frames addressed by the frame id, LF is kept in sync with the stack of local frames
+        self.frames = [new_frame(len(program.global_names)), None, None]
+        max_depth = args.get('max_call_depth') or MAX_DEPTH
+        self.local_frames = FrameStack(max_depth)
+        # Native values, their type is given by the Python type
+        self.data_stack = []
+        self.call_stack = CallStack(max_depth)
+        self.handlers = self.build_handlers()
+        self.stats = stats
+        self.profiler = profiler
+        self.max_steps = args.get('max_steps')
+        self.timeout = args.get('timeout')
+
+    # Runs the program from the given instruction index
     def execute(self, current_order=0):
-        for instruction in self.program.instructions[current_order:]:
-            # Break the loop if list is empty
-            if len(self.program.instructions) == 0:
+        # Buffered output is written also when EXIT or an error terminates the program
+        try:
+            if self.profiler is not None:
+                self.run_with_profiler(current_order)
+            elif self.stats is not None:
+                self.run_with_stats(current_order)
+            elif self.max_steps is not None or self.timeout is not None:
+                self.run_with_limits(current_order)
+            else:
+                self.run(current_order)
+        finally:
+            self.output.flush()
+
+    # Execution loop, jumps only move the program counter
+    def run(self, pc):
+        instructions = self.program.instructions
+        handlers = self.handlers
+        end = len(instructions)
+        while pc < end:
+            instruction = instructions[pc]
+            # Control flow instructions return index of the next instruction, others fall through
+            target = handlers[instruction.opcode](instruction)
+            if target is None:
+                pc += 1
+            else:
+                pc = target
+
+    # Same loop as run() which also counts executed instructions and initialized variables
+    def run_with_stats(self, pc):
+        instructions = self.program.instructions
+        handlers = self.handlers
+        end = len(instructions)
+        stats = self.stats
+        counts = stats.counts
+        track_vars = stats.track_vars
+        frames = self.frames
+        # Limits are checked when the countdown reaches zero, without them it stays negative
+        (countdown, deadline) = self.start_limits()
+        batch = countdown
+        steps = 0
+        while pc < end:
+            instruction = instructions[pc]
+            counts[pc] += 1
+            opcode = instruction.opcode
+            if track_vars and opcode in WRITING_OPCODES:
+                # Variable without value gets initialized by this instruction
+                _, frame_id, slot = instruction.operands[0]
+                current_frame = frames[frame_id]
+                initializes = current_frame is not None and current_frame[slot] is None
+                target = handlers[opcode](instruction)
+                if initializes:
+                    stats.variable_initialized()
+            elif track_vars and (opcode == CREATEFRAME or opcode == POPFRAME):
+                dropped = frames[TF_FRAME]
+                target = handlers[opcode](instruction)
+                stats.frame_dropped(dropped)
+            else:
+                target = handlers[opcode](instruction)
+            if target is None:
+                pc += 1
+            else:
+                pc = target
+            countdown -= 1
+            if countdown == 0 and pc < end:
+                steps += batch
+                countdown = batch = self.check_limits(steps, pc, deadline)
+
+    # Same loop as run() which stops the program after the step limit or the timeout
+    def run_with_limits(self, pc):
+        instructions = self.program.instructions
+        handlers = self.handlers
+        end = len(instructions)
+        (batch, deadline) = self.start_limits()
+        steps = 0
+        while pc < end:
+            # Limits are not checked inside the batch of instructions
+            for _ in repeat(None, batch):
+                if pc >= end:
+                    return
+                instruction = instructions[pc]
+                target = handlers[instruction.opcode](instruction)
+                if target is None:
+                    pc += 1
+                else:
+                    pc = target
+            steps += batch
+            if pc >= end:
                 break
-            match instruction.opcode:
-                case "MOVE":
-                    self.move_instruction(instruction)
-                case "CREATEFRAME":
-                    self.createframe_instruction(instruction)
-                case "PUSHFRAME":
-                    self.pushframe_instruction(instruction)
-                case "POPFRAME":
-                    self.popframe_instruction(instruction)
-                case "DEFVAR":
-                    self.defvar_instruction(instruction)
-                case "ADD" | "MUL" | "SUB" | "IDIV":
-                    self.math_instruction(instruction)
-                case "CONCAT":
-                    self.concat_instruction(instruction)
-                case "WRITE":
-                    self.write_instruction(instruction)
-                case "SETCHAR":
-                    self.setchar_instruction(instruction)
-                case "STRLEN":
-                    self.strlen_instruction(instruction)
-                case "STRI2INT":
-                    self.stri2int_instruction(instruction)
-                case "INT2CHAR":
-                    self.int2char_instruction(instruction)
-                case "GETCHAR":
-                    self.getchar_instruction(instruction)
-                case "TYPE":
-                    self.type_instruction(instruction)
-                case "EXIT":
-                    self.exit_instruction(instruction)
-                case "DPRINT":
-                    self.dprint_instruction(instruction)
-                case "BREAK":
-                    self.break_instruction(instruction)
-                case "OR" | "AND" | "NOT":
-                    self.bool_instruction(instruction)
-                case "LT" | "GT" | "EQ":
-                    self.relation_instruction(instruction)
-                case "PUSHS":
-                    self.pushs_instruction(instruction)
-                case "POPS":
-                    self.pops_instruction(instruction)
-                case "READ":
-                    self.read_instruction(instruction)
-                case "LABEL":
-                    self.label_instruction(instruction)
-                case "CALL":
-                    self.call_instruction(instruction)
-                case "JUMPIFEQ" | "JUMPIFNEQ":
-                    self.jump_condition_instruction(instruction)
-                case "JUMP":
-                    self.jump_instruction(instruction)
-                case "RETURN":
-                    self.return_instruction(instruction)
-
-            # If current instruction is the last - clear the list and terminate the loop
-            if len(self.program.instructions) > 0:
-                if instruction == self.program.instructions[-1]:
-                    self.program.instructions.clear()
-                    break
-
-    @staticmethod
-    def count_arguments(instruction, expected):
-        if len(instruction.arguments) != expected:
-            E.error_exit("Error: wrong number of arguments.\n", STRUCTURE_ERROR)
-
-    def get_variable(self, name: str):
-        [frame_name, var_name] = name.split("@")
-        current_frame = self.get_frame(frame_name)
-        if var_name not in current_frame:
+            batch = self.check_limits(steps, pc, deadline)
+
+    # Number of instructions before the first check of the limits and the deadline of the timeout,
+    # the number is -1 when no limit is set, so the countdown of the loops never reaches zero
+    def start_limits(self):
+        if self.max_steps is None and self.timeout is None:
+            return -1, None
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        return self.next_check(0), deadline
+
+    # Instructions until the next check, the last batch ends exactly at the step limit
+    def next_check(self, steps):
+        if self.max_steps is not None and steps + LIMIT_CHECK_INTERVAL > self.max_steps:
+            return self.max_steps - steps
+        return LIMIT_CHECK_INTERVAL
+
+    # Stops the program when a limit is reached after the steps, otherwise returns the next countdown
+    def check_limits(self, steps, pc, deadline):
+        if self.max_steps is not None and steps >= self.max_steps:
+            self.limit_exit("step limit reached", steps, pc)
+        if deadline is not None and time.monotonic() >= deadline:
+            self.limit_exit("timeout expired", steps, pc)
+        return self.next_check(steps)
+
+    # Ends the program stopped by a limit, the buffered output is flushed by error_exit
+    def limit_exit(self, reason, steps, pc):
+        instruction = self.program.instructions[pc]
+        E.error_exit(f"Error: {reason} after {steps} steps, next instruction is {ALL_NAMES[instruction.opcode]} "
+                     f"with order {instruction.order}.\n", LIMIT_ERROR)
+
+    # Same loop as run() which measures every instruction and follows CALL/RETURN pairs
+    def run_with_profiler(self, pc):
+        instructions = self.program.instructions
+        handlers = self.handlers
+        end = len(instructions)
+        profiler = self.profiler
+        hits = profiler.hits
+        times = profiler.times
+        clock = time.perf_counter_ns
+        (countdown, deadline) = self.start_limits()
+        batch = countdown
+        steps = 0
+        while pc < end:
+            instruction = instructions[pc]
+            opcode = instruction.opcode
+            if opcode == CALL:
+                profiler.enter(instruction)
+            start = clock()
+            target = handlers[opcode](instruction)
+            times[pc] += clock() - start
+            hits[pc] += 1
+            if opcode == RETURN:
+                profiler.leave()
+            if target is None:
+                pc += 1
+            else:
+                pc = target
+            countdown -= 1
+            if countdown == 0 and pc < end:
+                steps += batch
+                countdown = batch = self.check_limits(steps, pc, deadline)
+
+    # Dispatch table indexed by the opcode, built once for the execution
+    def build_handlers(self):
+        table = {
+            MOVE: self.move_instruction,
+            CREATEFRAME: self.createframe_instruction,
+            PUSHFRAME: self.pushframe_instruction,
+            POPFRAME: self.popframe_instruction,
+            DEFVAR: self.defvar_instruction,
+            CALL: self.call_instruction,
+            RETURN: self.return_instruction,
+            PUSHS: self.pushs_instruction,
+            POPS: self.pops_instruction,
+            ADD: self.math_instruction,
+            SUB: self.math_instruction,
+            MUL: self.math_instruction,
+            IDIV: self.math_instruction,
+            LT: self.relation_instruction,
+            GT: self.relation_instruction,
+            EQ: self.relation_instruction,
+            AND: self.bool_instruction,
+            OR: self.bool_instruction,
+            NOT: self.bool_instruction,
+            INT2CHAR: self.int2char_instruction,
+            STRI2INT: self.stri2int_instruction,
+            READ: self.read_instruction,
+            WRITE: self.write_instruction,
+            CONCAT: self.concat_instruction,
+            STRLEN: self.strlen_instruction,
+            GETCHAR: self.getchar_instruction,
+            SETCHAR: self.setchar_instruction,
+            TYPE: self.type_instruction,
+            LABEL: self.label_instruction,
+            JUMP: self.jump_instruction,
+            JUMPIFEQ: self.jump_condition_instruction,
+            JUMPIFNEQ: self.jump_condition_instruction,
+            EXIT: self.exit_instruction,
+            DPRINT: self.dprint_instruction,
+            BREAK: self.break_instruction,
+            CLEARS: self.clears_instruction,
+            ADDS: self.stack_math_instruction,
+            SUBS: self.stack_math_instruction,
+            MULS: self.stack_math_instruction,
+            IDIVS: self.stack_math_instruction,
+            LTS: self.stack_relation_instruction,
+            GTS: self.stack_relation_instruction,
+            EQS: self.stack_relation_instruction,
+            ANDS: self.stack_bool_instruction,
+            ORS: self.stack_bool_instruction,
+            NOTS: self.stack_bool_instruction,
+            INT2CHARS: self.int2chars_instruction,
+            STRI2INTS: self.stri2ints_instruction,
+            JUMPIFEQS: self.jump_condition_stack_instruction,
+            JUMPIFNEQS: self.jump_condition_stack_instruction,
+            DEFVAR_MOVE: self.defvar_move_instruction,
+            ARITHMETIC_JUMPIF: self.arithmetic_jumpif_instruction,
+            RELATION_JUMPIF: self.relation_jumpif_instruction,
+            PUSHS_PUSHS_POPS: self.pushs_pushs_pops_instruction,
+        }
+        return [table[opcode] for opcode in range(len(ALL_NAMES))]
+
+    # Returns the variable addressed by the operand (VAR_OPERAND, frame id, slot)
+    def get_variable(self, operand):
+        current_frame = self.frames[operand[1]]
+        if current_frame is None:
+            E.error_exit("Error: frame doesn't exist.\n", FRAME_ERROR)
+        variable = current_frame[operand[2]]
+        if variable is UNDEFINED:
             E.error_exit("Error: variable is not defined in this frame.\n", UNDECLARED_VAR_ERROR)
 
-        return current_frame[var_name]
+        return variable
 
-    def get_frame(self, frame_name):
-        if frame_name == LF_FRAME_NAME:
-            current_frame = self.frames[frame_name][0]
-        else:
-            current_frame = self.frames[frame_name]
+    def set_variable(self, operand, variable):
+        current_frame = self.frames[operand[1]]
         if current_frame is None:
             E.error_exit("Error: frame doesn't exist.\n", FRAME_ERROR)
-
-        return current_frame
-
-    def set_variable(self, name, variable):
-        [frame_name, var_name] = name.split("@")
-        current_frame = self.get_frame(frame_name)
-        if var_name not in current_frame:
+        slot = operand[2]
+        if current_frame[slot] is UNDEFINED:
             E.error_exit("Error: variable is not defined in this frame.\n", UNDECLARED_VAR_ERROR)
 
-        current_frame[var_name] = variable
+        current_frame[slot] = variable
 
+    # Returns type and value of the operand, constants carry them directly
     def check_type(self, symbol):
-        if symbol.arg_type == VAR_ARG_TYPE:
-            result = self.get_variable(symbol.value)
-            if result.value is None:
+        if symbol[0] == VAR_OPERAND:
+            result = self.get_variable(symbol)
+            if result is None:
                 E.error_exit("Error: variable has no value.\n", NO_VALUE_ERROR)
-            type = result.var_type
-            value = result.value
-        else:
-            type = symbol.arg_type
-            value = symbol.value
-        return type, value
+            return result.var_type, result.value
+        return symbol[1], symbol[2]
+
+    # Same as check_type, string builders give their list of characters which is not joined
+    def check_text(self, symbol):
+        if symbol[0] == VAR_OPERAND:
+            result = self.get_variable(symbol)
+            if result is None:
+                E.error_exit("Error: variable has no value.\n", NO_VALUE_ERROR)
+            if type(result) is StringBuilder:
+                return STRING_ARG_TYPE, result.chars
+            return result.var_type, result.value
+        return symbol[1], symbol[2]
 
     def move_instruction(self, instruction):
-        self.count_arguments(instruction, 2)
-
-        var_name = instruction.arguments[0]
-        symb = instruction.arguments[1]
-
-        if var_name.arg_type != VAR_ARG_TYPE:
-            E.error_exit("Error: wrong type of argument.\n", STRUCTURE_ERROR)
+        var_name = instruction.operands[0]
+        symb = instruction.operands[1]
 
         symb_type, symb_value = self.check_type(symb)
-        if symb_type == STRING_ARG_TYPE and symb_value is None:
-            symb_value = ""
-
-        self.set_variable(var_name.value, Variable(symb_type, symb_value))
+        self.set_variable(var_name, Variable(symb_type, symb_value))
 
     def createframe_instruction(self, instruction):
-        self.count_arguments(instruction, 0)
-        self.frames[TF_FRAME_NAME] = {}
+        self.frames[TF_FRAME] = LocalFrame()
 
     def defvar_instruction(self, instruction):
-        self.count_arguments(instruction, 1)
-        if instruction.arguments[0].arg_type != VAR_ARG_TYPE:
-            E.error_exit("Error: wrong type of argument.\n", STRUCTURE_ERROR)
-        name = instruction.arguments[0].value
-
-        [frame_name, var_name] = name.split("@")
-        current_frame = self.get_frame(frame_name)
-        if var_name in current_frame:
+        _, frame_id, slot = instruction.operands[0]
+        current_frame = self.frames[frame_id]
+        if current_frame is None:
+            E.error_exit("Error: frame doesn't exist.\n", FRAME_ERROR)
+        if current_frame[slot] is not UNDEFINED:
             E.error_exit("Error: repeated definition of the variable.\n", SEMANTIC_ERROR)
 
-        current_frame[var_name] = None
+        current_frame[slot] = None
 
     def pushframe_instruction(self, instruction):
-        self.count_arguments(instruction, 0)
-        if self.frames[TF_FRAME_NAME] is None:
+        if self.frames[TF_FRAME] is None:
             E.error_exit("Error: frame is not defined.\n", FRAME_ERROR)
-        self.frames[LF_FRAME_NAME].append(self.frames[TF_FRAME_NAME])
-        self.frames[TF_FRAME_NAME] = None
+        self.local_frames.push(self.frames[TF_FRAME])
+        self.frames[LF_FRAME] = self.frames[TF_FRAME]
+        self.frames[TF_FRAME] = None
 
     def popframe_instruction(self, instruction):
-        self.count_arguments(instruction, 0)
-        if len(self.frames[LF_FRAME_NAME]) == 0:
+        if len(self.local_frames) == 0:
             E.error_exit("Error: frame is empty.\n", FRAME_ERROR)
-        self.frames[TF_FRAME_NAME] = self.frames[LF_FRAME_NAME].pop()
+        self.frames[TF_FRAME] = self.local_frames.pop()
+        self.frames[LF_FRAME] = self.local_frames.top()
 
     def math_instruction(self, instruction):
-        self.count_arguments(instruction, 3)
-
-        var = instruction.arguments[0]
-        symb1 = instruction.arguments[1]
-        symb2 = instruction.arguments[2]
-
-        if var.arg_type != VAR_ARG_TYPE:
-            E.error_exit("Error: wrong type of argument.\n", STRUCTURE_ERROR)
+        var = instruction.operands[0]
+        symb1 = instruction.operands[1]
+        symb2 = instruction.operands[2]
 
         first_op_type, first_op = self.check_type(symb1)
         second_op_type, second_op = self.check_type(symb2)
@@ -206,34 +363,37 @@ class Execution:
         if first_op_type != INT_ARG_TYPE or second_op_type != INT_ARG_TYPE:
             E.error_exit("Error: wrong type of argument.\n", OPERAND_TYPE_ERROR)
 
-        if first_op[0] == "-" or second_op[0] == "-":
-            if not (first_op[1:].isnumeric() and second_op[1:].isnumeric()):
-                E.error_exit("Error: wrong value of argument.\n", STRUCTURE_ERROR)
-        elif not (first_op.isnumeric() and second_op.isnumeric()):
-            E.error_exit("Error: wrong value of argument.\n", STRUCTURE_ERROR)
-
-        if instruction.opcode == "ADD":
-            result = str(int(first_op) + int(second_op))
-        elif instruction.opcode == "MUL":
-            result = str(int(first_op) * int(second_op))
-        elif instruction.opcode == "SUB":
-            result = str(int(first_op) - int(second_op))
+        if instruction.opcode == ADD:
+            result = first_op + second_op
+        elif instruction.opcode == MUL:
+            result = first_op * second_op
+        elif instruction.opcode == SUB:
+            result = first_op - second_op
         else:
-            if second_op == "0":
+            if second_op == 0:
                 E.error_exit("Eror: division by zero.\n", WRONG_VALUE_ERROR)
-            result = str(int(int(first_op) / int(second_op)))
+            result = first_op // second_op
 
-        self.set_variable(var.value, Variable(INT_ARG_TYPE, result))
+        self.set_variable(var, Variable(INT_ARG_TYPE, result))
 
     def concat_instruction(self, instruction):
-        self.count_arguments(instruction, 3)
-
-        var = instruction.arguments[0]
-        symb1 = instruction.arguments[1]
-        symb2 = instruction.arguments[2]
-
-        if var.arg_type != VAR_ARG_TYPE:
-            E.error_exit("Error: wrong type of argument.\n", STRUCTURE_ERROR)
+        var = instruction.operands[0]
+        symb1 = instruction.operands[1]
+        symb2 = instruction.operands[2]
+
+        # Concatenation onto the same variable appends to its builder
+        if symb1 == var:
+            target = self.get_variable(var)
+            if target is None:
+                E.error_exit("Error: variable has no value.\n", NO_VALUE_ERROR)
+            second_op_type, second_op = self.check_type(symb2)
+            if target.var_type != STRING_ARG_TYPE or second_op_type != STRING_ARG_TYPE:
+                E.error_exit("Error: wrong type of argument.\n", OPERAND_TYPE_ERROR)
+            if type(target) is not StringBuilder:
+                target = StringBuilder(target.value)
+                self.set_variable(var, target)
+            target.append(second_op)
+            return
 
         first_op_type, first_op = self.check_type(symb1)
         second_op_type, second_op = self.check_type(symb2)
@@ -242,186 +402,153 @@ class Execution:
             E.error_exit("Error: wrong type of argument.\n", OPERAND_TYPE_ERROR)
 
         result = first_op + second_op
-        self.set_variable(var.value, Variable(STRING_ARG_TYPE, result))
+        self.set_variable(var, Variable(STRING_ARG_TYPE, result))
 
     def write_instruction(self, instruction):
-        self.count_arguments(instruction, 1)
-        symb = instruction.arguments[0]
+        symb = instruction.operands[0]
         symb_type, symb_value = self.check_type(symb)
 
         if symb_type == STRING_ARG_TYPE:
-            result = ""
-            i = 0
-            while i < len(symb_value):
-                if symb_value[i] == '\\' and i + 3 < len(symb_value) and symb_value[i + 1:i + 4].isdigit():
-                    add = symb_value[i + 1:i + 4].encode().decode("unicode-escape")
-                    result += chr(int(add))
-                    i += 4
-                else:
-                    result += symb_value[i]
-                    i += 1
-        elif symb_type == NIL_ARG_TYPE:
-            result = ""
+            self.output.write(symb_value)
         else:
-            result = symb_value
-        print(str(result), end='', file=sys.stdout)
+            self.output.write(to_text(symb_type, symb_value))
 
     def setchar_instruction(self, instruction):
-        self.count_arguments(instruction, 3)
-
-        var = instruction.arguments[0]
-        symb1 = instruction.arguments[1]
-        symb2 = instruction.arguments[2]
+        var = instruction.operands[0]
+        symb1 = instruction.operands[1]
+        symb2 = instruction.operands[2]
 
-        if var.arg_type != VAR_ARG_TYPE:
-            E.error_exit("Error: wrong type of argument.\n", STRUCTURE_ERROR)
-
-        var_op_type, var_op = self.check_type(var)
+        var_op_type, var_op = self.check_text(var)
         first_op_type, first_op = self.check_type(symb1)
         second_op_type, second_op = self.check_type(symb2)
 
         if var_op_type != STRING_ARG_TYPE or first_op_type != INT_ARG_TYPE or second_op_type != STRING_ARG_TYPE:
             E.error_exit("Error: wrong type of argument.\n", OPERAND_TYPE_ERROR)
 
-        if not first_op.isnumeric() or int(first_op) < 0 or int(first_op) > len(var_op) or second_op == "":
+        if not (0 <= first_op < len(var_op)) or second_op == "":
             E.error_exit("Error: operation is not possible.\n", STRING_ERROR)
 
-        src_string = var_op[:int(first_op)] + second_op[0] + var_op[int(first_op) + 1:]
-        self.set_variable(var.value, Variable(STRING_ARG_TYPE, src_string))
+        # Character is replaced in place, the first SETCHAR turns the string to the builder
+        target = self.get_variable(var)
+        if type(target) is not StringBuilder:
+            target = StringBuilder(var_op)
+            self.set_variable(var, target)
+        target.set_char(first_op, second_op[0])
 
     def strlen_instruction(self, instruction):
-        self.count_arguments(instruction, 2)
-
-        var = instruction.arguments[0]
-        symb = instruction.arguments[1]
+        var = instruction.operands[0]
+        symb = instruction.operands[1]
 
-        if var.arg_type != VAR_ARG_TYPE:
-            E.error_exit("Error: wrong type of argument.\n", STRUCTURE_ERROR)
-
-        symb_type, symb_value = self.check_type(symb)
+        symb_type, symb_value = self.check_text(symb)
 
         if symb_type != STRING_ARG_TYPE:
             E.error_exit("Error: wrong type of argument.\n", OPERAND_TYPE_ERROR)
 
         result = len(symb_value)
-        self.set_variable(var.value, Variable(INT_ARG_TYPE, result))
+        self.set_variable(var, Variable(INT_ARG_TYPE, result))
 
     def stri2int_instruction(self, instruction):
-        self.count_arguments(instruction, 3)
+        var = instruction.operands[0]
+        symb1 = instruction.operands[1]
+        symb2 = instruction.operands[2]
 
-        var = instruction.arguments[0]
-        symb1 = instruction.arguments[1]
-        symb2 = instruction.arguments[2]
-
-        if var.arg_type != VAR_ARG_TYPE:
-            E.error_exit("Error: wrong type of argument.\n", STRUCTURE_ERROR)
-            exit(STRUCTURE_ERROR)
-
-        first_op_type, first_op = self.check_type(symb1)
+        first_op_type, first_op = self.check_text(symb1)
         second_op_type, second_op = self.check_type(symb2)
 
         if first_op_type != STRING_ARG_TYPE or second_op_type != INT_ARG_TYPE:
             E.error_exit("Error: wrong type of argument.\n", OPERAND_TYPE_ERROR)
 
-        if not second_op.isnumeric() or int(second_op) < 0 or int(second_op) > len(first_op) or second_op == "":
+        if not (0 <= second_op < len(first_op)):
             E.error_exit("Error: operation is not possible.\n", STRING_ERROR)
 
-        result = ord(first_op[int(second_op)])
-        self.set_variable(var.value, Variable(INT_ARG_TYPE, result))
+        result = ord(first_op[second_op])
+        self.set_variable(var, Variable(INT_ARG_TYPE, result))
 
     def int2char_instruction(self, instruction):
-        self.count_arguments(instruction, 2)
-
-        var = instruction.arguments[0]
-        symb = instruction.arguments[1]
-
-        if var.arg_type != VAR_ARG_TYPE:
-            E.error_exit("Error: wrong type of argument.\n", STRUCTURE_ERROR)
+        var = instruction.operands[0]
+        symb = instruction.operands[1]
 
         symb_type, symb_value = self.check_type(symb)
         if symb_type != INT_ARG_TYPE:
             E.error_exit("Error: wrong type of argument.\n", OPERAND_TYPE_ERROR)
-        if not symb_value.isnumeric() or not (0 <= int(symb_value) <= 256):
-            E.error_exit("Error: operation is not possible.\n", STRING_ERROR)
 
-        result = chr(int(symb_value))
-        if len(result) != 1:
-            E.error_exit("Error: can't perform an operation.\n", STRING_ERROR)
-        self.set_variable(var.value, Variable(STRING_ARG_TYPE, result))
+        try:
+            result = chr(symb_value)
+        except (ValueError, OverflowError):
+            E.error_exit("Error: operation is not possible.\n", STRING_ERROR)
+        self.set_variable(var, Variable(STRING_ARG_TYPE, result))
 
     def getchar_instruction(self, instruction):
-        self.count_arguments(instruction, 3)
+        var = instruction.operands[0]
+        symb1 = instruction.operands[1]
+        symb2 = instruction.operands[2]
 
-        var = instruction.arguments[0]
-        symb1 = instruction.arguments[1]
-        symb2 = instruction.arguments[2]
-
-        if var.arg_type != VAR_ARG_TYPE:
-            E.error_exit("Error: wrong type of argument.\n", STRUCTURE_ERROR)
-
-        first_op_type, first_op = self.check_type(symb1)
+        first_op_type, first_op = self.check_text(symb1)
         second_op_type, second_op = self.check_type(symb2)
 
         if first_op_type != STRING_ARG_TYPE or second_op_type != INT_ARG_TYPE:
             E.error_exit("Error: wrong type of argument.\n", OPERAND_TYPE_ERROR)
 
-        if not second_op.isnumeric() or not (0 <= int(second_op) < len(first_op)) or second_op == "":
+        if not (0 <= second_op < len(first_op)):
             E.error_exit("Error: operation is not possible.\n", STRING_ERROR)
 
-        result = first_op[int(second_op)]
-        self.set_variable(var.value, Variable(STRING_ARG_TYPE, result))
+        result = first_op[second_op]
+        self.set_variable(var, Variable(STRING_ARG_TYPE, result))
 
     def type_instruction(self, instruction):
-        self.count_arguments(instruction, 2)
-
-        var = instruction.arguments[0]
-        symb = instruction.arguments[1]
+        var = instruction.operands[0]
+        symb = instruction.operands[1]
 
-        if var.arg_type != VAR_ARG_TYPE:
-            E.error_exit("Error: wrong type of argument.\n", STRUCTURE_ERROR)
-
-        if symb.arg_type == VAR_ARG_TYPE:
-            symb_var = self.get_variable(symb.value)
+        if symb[0] == VAR_OPERAND:
+            symb_var = self.get_variable(symb)
             if symb_var is None:
                 result = ""
             else:
                 result = symb_var.var_type
         else:
-            result = symb.arg_type
+            result = symb[1]
 
-        self.set_variable(var.value, Variable(STRING_ARG_TYPE, result))
+        self.set_variable(var, Variable(STRING_ARG_TYPE, result))
 
     def exit_instruction(self, instruction):
-        self.count_arguments(instruction, 1)
-        symb = instruction.arguments[0]
+        symb = instruction.operands[0]
         symb_type, symb_value = self.check_type(symb)
         if symb_type != INT_ARG_TYPE:
             E.error_exit("Error: wrong type of argument.\n", OPERAND_TYPE_ERROR)
-        if not symb_value.isnumeric() or not (0 <= int(symb_value) <= 49):
+        if not (0 <= symb_value <= 49):
             E.error_exit("Error: invalid exit code.\n", WRONG_VALUE_ERROR)
-        exit(int(symb_value))
+        exit(symb_value)
 
     def dprint_instruction(self, instruction):
-        self.count_arguments(instruction, 1)
-        symb = instruction.arguments[0]
+        symb = instruction.operands[0]
         symb_type, symb_value = self.check_type(symb)
-        sys.stderr.write(symb_value)
+        self.output.before_stderr()
+        sys.stderr.write(to_text(symb_type, symb_value))
 
     def break_instruction(self, instruction):
-        self.count_arguments(instruction, 0)
-        result = str(self.frames) + "\nNumber of executed instructions = " + str(instruction.order) + "\n"
+        result = self.format_frames() + "\nNumber of executed instructions = " + str(instruction.order) + "\n"
+        self.output.before_stderr()
         sys.stderr.write(result)
 
-    def bool_instruction(self, instruction):
-        if instruction.opcode == "AND" or instruction.opcode == "OR":
-            self.count_arguments(instruction, 3)
+    # Frame contents with variable names, used by BREAK
+    def format_frames(self):
+        def named(frame, names):
+            if frame is None:
+                return None
+            return {names[slot]: None if variable is None else variable.value
+                    for slot, variable in defined_variables(frame)}
 
-            var = instruction.arguments[0]
-            symb1 = instruction.arguments[1]
-            symb2 = instruction.arguments[2]
+        return str({
+            "GF": named(self.frames[GF_FRAME], self.program.global_names),
+            "LF": [named(frame, self.program.local_names) for frame in self.local_frames],
+            "TF": named(self.frames[TF_FRAME], self.program.local_names)
+        })
 
-            if var.arg_type != VAR_ARG_TYPE:
-                E.error_exit("Error: wrong type of argument.\n", STRUCTURE_ERROR)
+    def bool_instruction(self, instruction):
+        if instruction.opcode == AND or instruction.opcode == OR:
+            var = instruction.operands[0]
+            symb1 = instruction.operands[1]
+            symb2 = instruction.operands[2]
 
             symb1_type, symb1_value = self.check_type(symb1)
             symb2_type, symb2_value = self.check_type(symb2)
@@ -429,251 +556,263 @@ class Execution:
             if symb1_type != BOOL_ARG_TYPE or symb2_type != BOOL_ARG_TYPE:
                 E.error_exit("Error: wrong type of argument.\n", OPERAND_TYPE_ERROR)
 
-            if symb1_value not in ["true", "false"] or symb2_value not in ["true", "false"]:
-                E.error_exit("Error: wrong value of argument.\n", STRUCTURE_ERROR)
-
-            if symb1_value == "true":
-                symb1_value = True
+            if instruction.opcode == AND:
+                result = symb1_value and symb2_value
             else:
-                symb1_value = False
+                result = symb1_value or symb2_value
 
-            if symb2_value == "true":
-                symb2_value = True
-            else:
-                symb2_value = False
-
-            if instruction.opcode == "AND":
-                result = str(symb1_value and symb2_value).lower()
-            else:
-                result = str(symb1_value or symb2_value).lower()
-
-            self.set_variable(var.value, Variable(BOOL_ARG_TYPE, result))
+            self.set_variable(var, Variable(BOOL_ARG_TYPE, result))
 
         else:
-            self.count_arguments(instruction, 2)
-
-            var = instruction.arguments[0]
-            symb = instruction.arguments[1]
-
-            if var.arg_type != VAR_ARG_TYPE:
-                E.error_exit("Error: wrong type of argument.\n", STRUCTURE_ERROR)
+            var = instruction.operands[0]
+            symb = instruction.operands[1]
 
             symb_type, symb_value = self.check_type(symb)
 
             if symb_type != BOOL_ARG_TYPE:
                 E.error_exit("Error: wrong type of argument.\n", OPERAND_TYPE_ERROR)
 
-            if symb_value not in ["true", "false"]:
-                E.error_exit("Error: wrong value of argument.\n", STRUCTURE_ERROR)
-
-            if symb_value == "true":
-                symb_value = True
-            else:
-                symb_value = False
-
-            result = str(not symb_value).lower()
-            self.set_variable(var.value, Variable(BOOL_ARG_TYPE, result))
+            self.set_variable(var, Variable(BOOL_ARG_TYPE, not symb_value))
 
     def relation_instruction(self, instruction):
-        self.count_arguments(instruction, 3)
-        var = instruction.arguments[0]
-        symb1 = instruction.arguments[1]
-        symb2 = instruction.arguments[2]
-
-        if var.arg_type != VAR_ARG_TYPE:
-            E.error_exit("Error: wrong type of argument.\n", STRUCTURE_ERROR)
+        var = instruction.operands[0]
+        symb1 = instruction.operands[1]
+        symb2 = instruction.operands[2]
 
         symb1_type, symb1_value = self.check_type(symb1)
         symb2_type, symb2_value = self.check_type(symb2)
 
-        if instruction.opcode == "LT" or instruction.opcode == "GT":
+        if instruction.opcode == LT or instruction.opcode == GT:
             if symb1_type == NIL_ARG_TYPE or symb2_type == NIL_ARG_TYPE:
                 E.error_exit("Error: can't apply this instruction with nil operand.\n", OPERAND_TYPE_ERROR)
-            if symb1_type != symb2_type or (symb1_type or symb2_type) not in [INT_ARG_TYPE, STRING_ARG_TYPE, BOOL_ARG_TYPE]:
+            if symb1_type != symb2_type:
                 E.error_exit("Error: wrong type of argument.\n", OPERAND_TYPE_ERROR)
 
-            if symb1_type == BOOL_ARG_TYPE:
-                if symb1_value not in ["true", "false"] or symb2_value not in ["true", "false"]:
-                    E.error_exit("Error: wrong value of argument.\n", STRUCTURE_ERROR)
-
-                if symb1_value == "true":
-                    symb1_value = True
-                else:
-                    symb1_value = False
-
-                if symb2_value == "true":
-                    symb2_value = True
-                else:
-                    symb2_value = False
-
-            if symb1_type == INT_ARG_TYPE:
-                if not (symb1_value.isnumeric() and symb2_value.isnumeric()):
-                    E.error_exit("Error: wrong value of argument.\n", STRUCTURE_ERROR)
-                symb1_value = int(symb1_value)
-                symb2_value = int(symb2_value)
-
-            if instruction.opcode == "LT":
-                result = str(symb1_value < symb2_value).lower()
+            if instruction.opcode == LT:
+                result = symb1_value < symb2_value
             else:
-                result = str(symb1_value > symb2_value).lower()
+                result = symb1_value > symb2_value
         else:
-            if (symb1_type or symb2_type) not in [INT_ARG_TYPE, STRING_ARG_TYPE, BOOL_ARG_TYPE, NIL_ARG_TYPE]:
-                E.error_exit("Error: wrong type of argument.\n", OPERAND_TYPE_ERROR)
-
             if symb1_type == NIL_ARG_TYPE or symb2_type == NIL_ARG_TYPE:
-                if symb1_type == symb2_type:
-                    result = "true"
-                else:
-                    result = "false"
+                result = symb1_type == symb2_type
             else:
                 if symb1_type != symb2_type:
                     E.error_exit("Error: wrong type of argument.\n", OPERAND_TYPE_ERROR)
-                if symb1_type == BOOL_ARG_TYPE:
-                    if symb1_value not in ["true", "false"] or symb2_value not in ["true", "false"]:
-                        E.error_exit("Error: wrong value of argument.\n", STRUCTURE_ERROR)
-
-                    if symb1_value == "true":
-                        symb1_value = True
-                    else:
-                        symb1_value = False
-
-                    if symb2_value == "true":
-                        symb2_value = True
-                    else:
-                        symb2_value = False
-
-                if symb1_type == INT_ARG_TYPE:
-                    if not (symb1_value.isnumeric() and symb2_value.isnumeric()):
-                        E.error_exit("Error: wrong value of argument.\n", STRUCTURE_ERROR)
-                    symb1_value = int(symb1_value)
-                    symb2_value = int(symb2_value)
+                result = symb1_value == symb2_value
 
-                result = str(symb1_value == symb2_value).lower()
-
-        self.set_variable(var.value, Variable(BOOL_ARG_TYPE, result))
+        self.set_variable(var, Variable(BOOL_ARG_TYPE, result))
 
     def pushs_instruction(self, instruction):
-        self.count_arguments(instruction, 1)
-        symb = instruction.arguments[0]
+        symb = instruction.operands[0]
         symb_type, symb_value = self.check_type(symb)
-        self.data_stack.append([symb_type, symb_value])
+        self.data_stack.append(symb_value)
 
     def pops_instruction(self, instruction):
-        self.count_arguments(instruction, 1)
-        var = instruction.arguments[0]
-
-        if var.arg_type != VAR_ARG_TYPE:
-            E.error_exit("Error: wrong type of argument.\n", STRUCTURE_ERROR)
+        var = instruction.operands[0]
 
         if len(self.data_stack) == 0:
             E.error_exit("Error: stack is empty.\n", NO_VALUE_ERROR)
 
-        result_type = self.data_stack[-1][0]
-        result_value = self.data_stack[-1][1]
-        del self.data_stack[-1]
-        self.set_variable(var.value, Variable(result_type, result_value))
+        result = self.data_stack.pop()
+        self.set_variable(var, Variable(VALUE_TYPES[type(result)], result))
 
-    def read_instruction(self, instruction):
-        self.count_arguments(instruction, 2)
-        var = instruction.arguments[0]
-        type = instruction.arguments[1]
+    def pop_value(self):
+        if len(self.data_stack) == 0:
+            E.error_exit("Error: stack is empty.\n", NO_VALUE_ERROR)
+        return self.data_stack.pop()
+
+    # Operands of the stack instructions, the top of the stack is the second one
+    def pop_pair(self):
+        if len(self.data_stack) < 2:
+            E.error_exit("Error: stack is empty.\n", NO_VALUE_ERROR)
+        second = self.data_stack.pop()
+        return self.data_stack.pop(), second
 
-        if var.arg_type != VAR_ARG_TYPE or type.arg_type != TYPE_ARG_TYPE:
-            E.error_exit("Error: wrong type of argument.\n", STRUCTURE_ERROR)
+    def clears_instruction(self, instruction):
+        self.data_stack.clear()
 
-        if type.value not in [INT_ARG_TYPE, BOOL_ARG_TYPE, STRING_ARG_TYPE]:
-            E.error_exit("Error: wrong value of.\n", WRONG_VALUE_ERROR)
+    def stack_math_instruction(self, instruction):
+        first_op, second_op = self.pop_pair()
+        if type(first_op) is not int or type(second_op) is not int:
+            E.error_exit("Error: wrong type of argument.\n", OPERAND_TYPE_ERROR)
 
-        if self.args['input'] is None:
-            symb = input()
-            if symb == "":
-                self.set_variable(var.value, Variable(NIL_ARG_TYPE, ""))
-            symb = symb.rstrip()
+        if instruction.opcode == ADDS:
+            result = first_op + second_op
+        elif instruction.opcode == MULS:
+            result = first_op * second_op
+        elif instruction.opcode == SUBS:
+            result = first_op - second_op
         else:
-            symb = self.input_file.readline().strip()
-            if symb == "":
-                self.set_variable(var.value, Variable(NIL_ARG_TYPE, ""))
+            if second_op == 0:
+                E.error_exit("Eror: division by zero.\n", WRONG_VALUE_ERROR)
+            result = first_op // second_op
+        self.data_stack.append(result)
 
-        if type.value == INT_ARG_TYPE:
-            if not symb.isnumeric():
-                symb = ""
+    def stack_relation_instruction(self, instruction):
+        symb1_value, symb2_value = self.pop_pair()
+        if instruction.opcode == LTS or instruction.opcode == GTS:
+            if symb1_value is None or symb2_value is None:
+                E.error_exit("Error: can't apply this instruction with nil operand.\n", OPERAND_TYPE_ERROR)
+            if type(symb1_value) is not type(symb2_value):
+                E.error_exit("Error: wrong type of argument.\n", OPERAND_TYPE_ERROR)
+            if instruction.opcode == LTS:
+                result = symb1_value < symb2_value
             else:
-                symb = str(symb)
-        elif type.value == STRING_ARG_TYPE:
-            symb = str(symb)
-        elif type.value == BOOL_ARG_TYPE:
-            if symb.lower() == "true":
-                symb = "true"
-            elif symb.lower() == "false":
-                symb = "false"
+                result = symb1_value > symb2_value
+        elif symb1_value is None or symb2_value is None:
+            result = symb1_value is symb2_value
+        else:
+            if type(symb1_value) is not type(symb2_value):
+                E.error_exit("Error: wrong type of argument.\n", OPERAND_TYPE_ERROR)
+            result = symb1_value == symb2_value
+        self.data_stack.append(result)
 
-        self.set_variable(var.value, Variable(INT_ARG_TYPE, symb))
+    def stack_bool_instruction(self, instruction):
+        if instruction.opcode == NOTS:
+            symb_value = self.pop_value()
+            if type(symb_value) is not bool:
+                E.error_exit("Error: wrong type of argument.\n", OPERAND_TYPE_ERROR)
+            self.data_stack.append(not symb_value)
+            return
 
-    def label_instruction(self, instruction):
-        pass
+        symb1_value, symb2_value = self.pop_pair()
+        if type(symb1_value) is not bool or type(symb2_value) is not bool:
+            E.error_exit("Error: wrong type of argument.\n", OPERAND_TYPE_ERROR)
+        if instruction.opcode == ANDS:
+            self.data_stack.append(symb1_value and symb2_value)
+        else:
+            self.data_stack.append(symb1_value or symb2_value)
 
-    def call_instruction(self, instruction):
-        self.count_arguments(instruction, 1)
-        label = instruction.arguments[0]
+    def int2chars_instruction(self, instruction):
+        symb_value = self.pop_value()
+        if type(symb_value) is not int:
+            E.error_exit("Error: wrong type of argument.\n", OPERAND_TYPE_ERROR)
+        try:
+            self.data_stack.append(chr(symb_value))
+        except (ValueError, OverflowError):
+            E.error_exit("Error: operation is not possible.\n", STRING_ERROR)
 
-        if label.arg_type != LABEL_ARG_TYPE:
-            E.error_exit("Error: wrong argument type.\n", STRUCTURE_ERROR)
+    def stri2ints_instruction(self, instruction):
+        first_op, second_op = self.pop_pair()
+        if type(first_op) is not str or type(second_op) is not int:
+            E.error_exit("Error: wrong type of argument.\n", OPERAND_TYPE_ERROR)
+        if not (0 <= second_op < len(first_op)):
+            E.error_exit("Error: operation is not possible.\n", STRING_ERROR)
+        self.data_stack.append(ord(first_op[second_op]))
 
-        if label.value not in self.program.labels:
-            E.error_exit("Error: label doesn't exist.\n", SEMANTIC_ERROR)
+    def read_instruction(self, instruction):
+        var = instruction.operands[0]
+        _, type = instruction.operands[1]
 
-        order = self.program.labels[label.value]
-        self.call_stack.append(int(instruction.order) + 1)
-        self.execute(int(order)-1)
+        # Prompt written by the program has to be visible before waiting for the user
+        if self.interactive_input:
+            self.output.flush()
+        value_type, value = self.reader.read(type)
+        self.set_variable(var, Variable(value_type, value))
 
-    # TODO
-    def return_instruction(self, instruction):
-        self.count_arguments(instruction, 0)
+    def label_instruction(self, instruction):
+        pass
 
+    # Label operands hold the index of the LABEL instruction, undefined labels are rejected by the compiler
+    def call_instruction(self, instruction):
+        target = instruction.operands[0][2]
+        self.call_stack.push(instruction.index + 1)
+        return target
+
+    def return_instruction(self, instruction):
         if len(self.call_stack) == 0:
             E.error_exit("Error: nowhere to return.\n", NO_VALUE_ERROR)
-        order = self.call_stack[-1]
-        del self.call_stack[-1]
-        self.execute(int(order) - 1)
+        return self.call_stack.pop()
 
     def jump_instruction(self, instruction):
-        self.count_arguments(instruction, 1)
-        label = instruction.arguments[0]
-
-        if label.arg_type != LABEL_ARG_TYPE:
-            E.error_exit("Error: wrong argument type.\n", STRUCTURE_ERROR)
-
-        if label.value not in self.program.labels:
-            E.error_exit("Error: label doesn't exist.\n", SEMANTIC_ERROR)
-
-        order = self.program.labels[label.value]
-        self.execute(int(order) - 1)
+        return instruction.operands[0][2]
 
     def jump_condition_instruction(self, instruction):
-        self.count_arguments(instruction, 3)
-        label = instruction.arguments[0]
-        symb1 = instruction.arguments[1]
-        symb2 = instruction.arguments[2]
-
-        if label.arg_type != LABEL_ARG_TYPE:
-            E.error_exit("Error: wrong argument type.\n", STRUCTURE_ERROR)
-
-        if label.value not in self.program.labels:
-            E.error_exit("Error: label doesn't exist.\n", SEMANTIC_ERROR)
+        target = instruction.operands[0][2]
+        symb1 = instruction.operands[1]
+        symb2 = instruction.operands[2]
 
         symb1_type, symb1_value = self.check_type(symb1)
         symb2_type, symb2_value = self.check_type(symb2)
-        order = self.program.labels[label.value]
 
         if symb1_type == symb2_type or symb1_type == NIL_ARG_TYPE or symb2_type == NIL_ARG_TYPE:
-            if instruction.opcode == "JUMPIFEQ":
+            if instruction.opcode == JUMPIFEQ:
                 if symb1_value == symb2_value:
-                    self.execute(int(order) - 1)
+                    return target
             else:
                 if symb1_value != symb2_value:
-                    self.execute(int(order) - 1)
+                    return target
         else:
             E.error_exit("Error: wrong arguments.\n", OPERAND_TYPE_ERROR)
+        return None
+
+    def jump_condition_stack_instruction(self, instruction):
+        target = instruction.operands[0][2]
+        symb1_value, symb2_value = self.pop_pair()
+
+        if type(symb1_value) is type(symb2_value) or symb1_value is None or symb2_value is None:
+            if (symb1_value == symb2_value) == (instruction.opcode == JUMPIFEQS):
+                return target
+        else:
+            E.error_exit("Error: wrong arguments.\n", OPERAND_TYPE_ERROR)
+        return None
+
+    # Superinstructions created by fusion.py, operands are the fused instructions.
+    # They behave as the instructions executed one after another and continue after the last one.
+    def defvar_move_instruction(self, instruction):
+        defvar, move = instruction.operands
+        self.defvar_instruction(defvar)
+        self.move_instruction(move)
+        return instruction.index + 2
+
+    def arithmetic_jumpif_instruction(self, instruction):
+        arithmetic, jump = instruction.operands
+        var = arithmetic.operands[0]
+        first_op_type, first_op = self.check_type(arithmetic.operands[1])
+        second_op_type, second_op = self.check_type(arithmetic.operands[2])
+        if first_op_type != INT_ARG_TYPE or second_op_type != INT_ARG_TYPE:
+            E.error_exit("Error: wrong type of argument.\n", OPERAND_TYPE_ERROR)
+        result = first_op + second_op if arithmetic.opcode == ADD else first_op - second_op
+        self.set_variable(var, Variable(INT_ARG_TYPE, result))
+
+        # The result variable is known to hold the integer, only the other symbol is checked
+        target = jump.operands[0][2]
+        symb1 = jump.operands[1]
+        symb2 = jump.operands[2]
+        symb1_type, symb1_value = (INT_ARG_TYPE, result) if symb1 == var else self.check_type(symb1)
+        symb2_type, symb2_value = (INT_ARG_TYPE, result) if symb2 == var else self.check_type(symb2)
+        if symb1_type == symb2_type or symb1_type == NIL_ARG_TYPE or symb2_type == NIL_ARG_TYPE:
+            if (symb1_value == symb2_value) == (jump.opcode == JUMPIFEQ):
+                return target
+        else:
+            E.error_exit("Error: wrong arguments.\n", OPERAND_TYPE_ERROR)
+        return instruction.index + 2
+
+    def relation_jumpif_instruction(self, instruction):
+        relation, jump = instruction.operands
+        symb1_type, symb1_value = self.check_type(relation.operands[1])
+        symb2_type, symb2_value = self.check_type(relation.operands[2])
+        if symb1_type == NIL_ARG_TYPE or symb2_type == NIL_ARG_TYPE:
+            E.error_exit("Error: can't apply this instruction with nil operand.\n", OPERAND_TYPE_ERROR)
+        if symb1_type != symb2_type:
+            E.error_exit("Error: wrong type of argument.\n", OPERAND_TYPE_ERROR)
+        result = symb1_value < symb2_value if relation.opcode == LT else symb1_value > symb2_value
+        self.set_variable(relation.operands[0], Variable(BOOL_ARG_TYPE, result))
+
+        # Result compared with bool@true decides the jump directly
+        target = jump.operands[0][2]
+        if result == (jump.opcode == JUMPIFEQ):
+            return target
+        return instruction.index + 2
+
+    def pushs_pushs_pops_instruction(self, instruction):
+        first, second, pops = instruction.operands
+        first_type, first_value = self.check_type(first.operands[0])
+        self.data_stack.append(first_value)
+        # Second value is popped right after the push
+        second_type, second_value = self.check_type(second.operands[0])
+        self.set_variable(pops.operands[0], Variable(second_type, second_value))
+        return instruction.index + 3
 
 
 
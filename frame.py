@@ -0,0 +1,29 @@
+# File: frame.py
+# Author: Maryia Mazurava
+
+
+# Global frame is a list of variables indexed by the slots assigned by the Compiler.
+# Slot holds UNDEFINED before DEFVAR, None for variable without value, otherwise Variable.
+UNDEFINED = object()
+
+
+# Creates a frame with all slots undefined
+def new_frame(size):
+    return [UNDEFINED] * size
+
+
+# Class representing the temporary or local frame. It holds only the variables defined in it,
+# so its size is given by its own DEFVARs and not by all local names of the program.
+# Missing slot reads as UNDEFINED like the slot of the global frame.
+class LocalFrame(dict):
+    __slots__ = ()
+
+    def __missing__(self, slot):
+        return UNDEFINED
+
+
+# Pairs (slot, variable) of the defined variables of any frame
+def defined_variables(frame):
+    if type(frame) is LocalFrame:
+        return frame.items()
+    return [(slot, variable) for (slot, variable) in enumerate(frame) if variable is not UNDEFINED]
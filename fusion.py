@@ -0,0 +1,101 @@
+# File: fusion.py
+# Author: Maryia Mazurava
+
+
+from program import CompiledProgram
+from instruction import CompiledInstruction
+from opcodes import *
+from compiler import CONST_OPERAND
+from binary import MappedInstructions
+
+TRUE_OPERAND = (CONST_OPERAND, "bool", True)
+
+
+# Superinstruction for the sequence starting at the index, None when no pattern matches.
+# Only the first instruction is replaced, the others stay in the list as jump targets and
+# the fused handler continues after the whole sequence.
+def fuse_at(instructions, index):
+    first = instructions[index]
+    if index + 1 >= len(instructions):
+        return None
+    second = instructions[index + 1]
+
+    if first.opcode == DEFVAR and second.opcode == MOVE:
+        return DEFVAR_MOVE, (first, second)
+
+    # Jump compares the result of the arithmetic with another symbol
+    if (first.opcode in (ADD, SUB) and second.opcode in (JUMPIFEQ, JUMPIFNEQ)
+            and first.operands[0] in second.operands[1:]):
+        return ARITHMETIC_JUMPIF, (first, second)
+
+    # Jump tests the result of the relation against true
+    if (first.opcode in (LT, GT) and second.opcode in (JUMPIFEQ, JUMPIFNEQ)
+            and (second.operands[1:] == (first.operands[0], TRUE_OPERAND)
+                 or second.operands[1:] == (TRUE_OPERAND, first.operands[0]))):
+        return RELATION_JUMPIF, (first, second)
+
+    if (first.opcode == PUSHS and second.opcode == PUSHS and index + 2 < len(instructions)
+            and instructions[index + 2].opcode == POPS):
+        return PUSHS_PUSHS_POPS, (first, second, instructions[index + 2])
+
+    return None
+
+
+def superinstruction(opcode, parts, index):
+    instruction = CompiledInstruction(parts[0].order, opcode, parts)
+    instruction.index = index
+    return instruction
+
+
+# Instructions of the mapped binary program fused on the first access, so loading still decodes
+# only the executed instructions. Every instruction is fused on its own, also the one covered by
+# the superinstruction before it, which is the same as executing the sequence from it.
+class LazyFusedInstructions(dict):
+    def __init__(self, instructions, fusions):
+        super().__init__()
+        self.instructions = instructions
+        self.fusions = fusions
+
+    def __len__(self):
+        return len(self.instructions)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __missing__(self, index):
+        if not 0 <= index < len(self.instructions):
+            raise IndexError(index)
+        fused = fuse_at(self.instructions, index)
+        if fused is None:
+            instruction = self.instructions[index]
+        else:
+            instruction = superinstruction(fused[0], fused[1], index)
+            self.fusions[ALL_NAMES[fused[0]]] += 1
+        self[index] = instruction
+        return instruction
+
+
+# Peephole pass replacing common sequences by superinstructions, the length of the program
+# and the indices of all instructions are kept. Returns the new program and numbers of fusions.
+# Mapped programs are fused lazily unless eager is set, their numbers of fusions then grow
+# during the execution.
+def fuse(program: CompiledProgram, eager=False):
+    fusions = {name: 0 for name in FUSED_NAMES}
+    if isinstance(program.instructions, MappedInstructions) and not eager:
+        instructions = LazyFusedInstructions(program.instructions, fusions)
+        return CompiledProgram(instructions, program.global_names, program.local_names), fusions
+
+    instructions = list(program.instructions)
+    index = 0
+    while index < len(instructions):
+        fused = fuse_at(instructions, index)
+        if fused is None:
+            index += 1
+            continue
+        opcode, parts = fused
+        instructions[index] = superinstruction(opcode, parts, index)
+        fusions[ALL_NAMES[opcode]] += 1
+        index += len(parts)
+
+    return CompiledProgram(instructions, program.global_names, program.local_names), fusions
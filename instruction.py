@@ -3,9 +3,20 @@
 
 
 class Instruction:
+    __slots__ = ("order", "arguments", "opcode")
+
     def __init__(self, order, opcode, arguments):
         self.order = order
         self.arguments = arguments
         self.opcode = opcode
 
 
+# Instruction with numeric opcode and pre-resolved operands, produced by the Compiler
+class CompiledInstruction:
+    __slots__ = ("order", "opcode", "operands", "index")
+
+    def __init__(self, order, opcode, operands):
+        self.order = order
+        self.opcode = opcode
+        self.operands = operands
+        self.index = None
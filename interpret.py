@@ -4,47 +4,91 @@
 
 from execution import Execution
 from parser import XMLParser
-import xml.etree.ElementTree as ET
+from compiler import Compiler
+from stats import Stats, STATS_OPTIONS
+from profiler import Profiler
+from cache import ProgramCache
+import binary
+import fusion
+from optimizer import Optimizer
+import batch
 from errors import *
 import errors as E
 import sys
 
 
-# Read XML file
-def read_xml_file(tree, file):
-    if tree is not None:
-        E.error_exit("Error: tree is not none.\n", PARAM_ERROR)
+# Open XML file, it is parsed while the program is loaded
+def open_xml_file(source, file):
+    if source is not None:
+        E.error_exit("Error: source is not none.\n", PARAM_ERROR)
 
     try:
-        return ET.parse(file)
+        return open(file, "rb")
     except FileNotFoundError:
         E.error_exit("Error: file not found.\n", PARAM_ERROR)
-    except ET.ParseError:
-        E.error_exit("Error: parse error.\n", FORMAT_ERROR)
 
 
 # Print help message
 def help_info():
     if len(sys.argv) != 2:
         E.error_exit("Error: wrong number of parameters.\n", PARAM_ERROR)
-    # TODO: other parameters
     print("interpret.py in Python 3.10.")
-    print("Usage: python3.10 interpret.py [--help] [--source=file] [--input=file] [--stats=file] [--insts]")
+    print("Usage: python3.10 interpret.py [--help] [--source=file] [--input=file] [--stats=file [stats options]]...")
     print(" --help: prints help message to standard output.")
     print(" --source=file: file with XML code.")
     print(" --input=file: file for the interpretation of the specified source code.")
-    print(" --stats=file: file for printing the statistics.")
+    print(" --stats=file: file for printing the statistics given by the following options.")
     print(" --insts: prints the number of so-called executed instructions.")
+    print(" --hot: prints the order of the most executed instruction.")
+    print(" --vars: prints the maximum number of initialized variables in all frames.")
+    print(" --frequent: prints names of the most executed opcodes.")
+    print(" --opcodes: prints numbers of executions of every opcode.")
+    print(" --print=string: prints the string.")
+    print(" --eol: prints the end of line.")
+    print(" --profile=file: writes time and hits of instructions, label blocks and calls to the file.")
+    print(" --profile-dump=file: writes the profile as JSON, or CSV for a .csv file.")
+    print(" --max-steps=N: stops the program with code 60 after N executed instructions.")
+    print(" --timeout=sec: stops the program with code 60 after the time in seconds.")
+    print(" --optimize: folds constant instructions, propagates constants in basic blocks and removes dead code.")
+    print(" --report-optimization: prints the reduction of the number of instructions to standard error output.")
+    print(" --no-fusion: executes the instructions without fusing common sequences into superinstructions.")
+    print(" --report-fusions: prints numbers of the fused instruction sequences to standard error output.")
+    print(" --max-call-depth=N: stops the program with code 60 when the calls or local frames are nested deeper than N.")
+    print(" --emit-binary=file: converts the source to the binary program in the file instead of running it.")
+    print("   Source files in the binary format are recognized and loaded without parsing.")
+    print(" --batch=file: runs the program once for every input file listed in the file, one path per line.")
+    print(" --batch-output=dir: directory for stdout and stderr of every batch run and the manifest.json.")
+    print(" --jobs=N: number of processes executing the batch runs, 1 by default.")
+    print(" --run-timeout=sec: time limit of every batch run, the run ends with code 60 when it is exceeded.")
+    print(" --cache=dir: keeps compiled programs in the directory and reuses them for the same source.")
+    print(" --cache-limit=MB: maximum size of the cache directory, 256 MB by default.")
 
 
 # Parse command line arguments, open files
 def parse_args():
     input_file = None
-    tree = None
+    source = None
     args = {
         'help': False,
         'source': None,
         'input': None,
+        'stats': [],
+        'profile': None,
+        'profile_dump': None,
+        'cache': None,
+        'cache_limit': None,
+        'emit_binary': None,
+        'batch': None,
+        'batch_output': None,
+        'jobs': 1,
+        'run_timeout': None,
+        'max_steps': None,
+        'timeout': None,
+        'max_call_depth': None,
+        'optimize': False,
+        'report_optimization': False,
+        'fusion': True,
+        'report_fusions': False,
     }
     i = 1
     while i < len(sys.argv):
@@ -54,31 +98,173 @@ def parse_args():
             exit(0)
         elif sys.argv[i].split('=')[0] == '--source':
              args['source'] = sys.argv[i].split('=')[1]
-             tree = read_xml_file(tree, args['source'])
+             source = open_xml_file(source, args['source'])
         elif sys.argv[i].split('=')[0] == '--input':
              args['input'] = sys.argv[i].split('=')[1]
              input_file = open(args['input'], "r")
+        elif sys.argv[i].split('=')[0] == '--stats':
+            file = sys.argv[i].split('=', 1)[1]
+            if file in [stats_file for (stats_file, options) in args['stats']]:
+                E.error_exit("Error: statistics file is repeated.\n", OUTPUT_ERROR)
+            args['stats'].append((file, []))
+        elif sys.argv[i].split('=')[0] == '--profile':
+            args['profile'] = sys.argv[i].split('=', 1)[1]
+        elif sys.argv[i].split('=')[0] == '--profile-dump':
+            args['profile_dump'] = sys.argv[i].split('=', 1)[1]
+        elif sys.argv[i].split('=')[0] == '--batch':
+            args['batch'] = sys.argv[i].split('=', 1)[1]
+        elif sys.argv[i].split('=')[0] == '--batch-output':
+            args['batch_output'] = sys.argv[i].split('=', 1)[1]
+        elif sys.argv[i].split('=')[0] == '--jobs':
+            jobs = sys.argv[i].split('=', 1)[1]
+            if not jobs.isnumeric() or int(jobs) == 0:
+                E.error_exit("Error: invalid number of jobs.\n", PARAM_ERROR)
+            args['jobs'] = int(jobs)
+        elif sys.argv[i].split('=')[0] == '--run-timeout':
+            try:
+                args['run_timeout'] = float(sys.argv[i].split('=', 1)[1])
+            except ValueError:
+                E.error_exit("Error: invalid run timeout.\n", PARAM_ERROR)
+            if not args['run_timeout'] > 0:
+                E.error_exit("Error: invalid run timeout.\n", PARAM_ERROR)
+        elif sys.argv[i].split('=')[0] == '--max-steps':
+            steps = sys.argv[i].split('=', 1)[1]
+            if not steps.isnumeric() or int(steps) == 0:
+                E.error_exit("Error: invalid step limit.\n", PARAM_ERROR)
+            args['max_steps'] = int(steps)
+        elif sys.argv[i].split('=')[0] == '--max-call-depth':
+            depth = sys.argv[i].split('=', 1)[1]
+            if not depth.isnumeric() or int(depth) == 0:
+                E.error_exit("Error: invalid maximum call depth.\n", PARAM_ERROR)
+            args['max_call_depth'] = int(depth)
+        elif sys.argv[i].split('=')[0] == '--timeout':
+            try:
+                args['timeout'] = float(sys.argv[i].split('=', 1)[1])
+            except ValueError:
+                E.error_exit("Error: invalid timeout.\n", PARAM_ERROR)
+            if not args['timeout'] > 0:
+                E.error_exit("Error: invalid timeout.\n", PARAM_ERROR)
+        elif sys.argv[i] == '--optimize':
+            args['optimize'] = True
+        elif sys.argv[i] == '--report-optimization':
+            args['report_optimization'] = True
+        elif sys.argv[i] == '--no-fusion':
+            args['fusion'] = False
+        elif sys.argv[i] == '--report-fusions':
+            args['report_fusions'] = True
+        elif sys.argv[i].split('=')[0] == '--emit-binary':
+            args['emit_binary'] = sys.argv[i].split('=', 1)[1]
+        elif sys.argv[i].split('=')[0] == '--cache':
+            args['cache'] = sys.argv[i].split('=', 1)[1]
+        elif sys.argv[i].split('=')[0] == '--cache-limit':
+            limit = sys.argv[i].split('=', 1)[1]
+            if not limit.isnumeric():
+                E.error_exit("Error: invalid cache limit.\n", PARAM_ERROR)
+            args['cache_limit'] = int(limit) * 1024 * 1024
+        elif sys.argv[i] in STATS_OPTIONS or sys.argv[i].startswith('--print='):
+            # Statistics options belong to the last --stats file
+            if len(args['stats']) == 0:
+                E.error_exit("Error: statistics option without --stats.\n", PARAM_ERROR)
+            args['stats'][-1][1].append(sys.argv[i])
         else:
             help_info()
             E.error_exit("Error: wrong parameters.\n", PARAM_ERROR)
         i += 1
 
-    if input_file is None and tree is None:
+    if args['batch'] is not None:
+        if args['batch_output'] is None or source is None:
+            E.error_exit("Error: --batch needs --source and --batch-output.\n", PARAM_ERROR)
+        if input_file is not None or args['stats'] or args['profile'] is not None:
+            E.error_exit("Error: --batch can't be combined with --input, --stats or --profile.\n", PARAM_ERROR)
+    elif args['batch_output'] is not None or args['jobs'] != 1 or args['run_timeout'] is not None:
+        E.error_exit("Error: --batch-output, --jobs and --run-timeout need --batch.\n", PARAM_ERROR)
+
+    if input_file is None and source is None:
         help_info()
         E.error_exit("Error: not enough arguments.\n", PARAM_ERROR)
-    elif tree is None:
-         tree = ET.parse(sys.stdin)
+    elif source is None:
+         source = sys.stdin.buffer
 
-    return tree, args, input_file
+    if args['report_optimization'] and not args['optimize']:
+        E.error_exit("Error: --report-optimization needs --optimize.\n", PARAM_ERROR)
+    if args['profile_dump'] is not None and args['profile'] is None:
+        E.error_exit("Error: --profile-dump needs --profile.\n", PARAM_ERROR)
+    if args['profile'] is not None and args['stats']:
+        E.error_exit("Error: --profile can't be combined with --stats.\n", PARAM_ERROR)
+    if args['batch'] is not None and args['timeout'] is not None:
+        E.error_exit("Error: use --run-timeout with --batch.\n", PARAM_ERROR)
 
+    # Statistics, profile and the limits count the source instructions one by one, so the steps
+    # and the instruction reported by the timeout mean the same as with the step limit
+    if args['stats'] or args['profile'] is not None or args['max_steps'] is not None or args['timeout'] is not None:
+        args['fusion'] = False
 
-if __name__ == '__main__':
-    tree, args, input_file = parse_args()
+    return source, args, input_file
+
+
+# Instructions are compiled while the XML is streamed
+def compile_source(source):
+    compiler = Compiler()
+    parser = XMLParser(source, compiler.compile_instruction)
+    return compiler.link(parser.parse().instructions)
+
+
+# Loads the compiled program from the binary format or the cache, XML is compiled only on a miss
+def load_program(source, args):
+    header = source.peek(len(binary.MAGIC)) if hasattr(source, "peek") else b""
+    if binary.is_binary(header):
+        return binary.load_file(source)
+
+    if args['cache'] is None:
+        return compile_source(source)
+
+    try:
+        if args['cache_limit'] is None:
+            cache = ProgramCache(args['cache'])
+        else:
+            cache = ProgramCache(args['cache'], args['cache_limit'])
+    except OSError:
+        E.error_exit("Error: can't use the cache directory.\n", PARAM_ERROR)
+
+    (key, source) = cache.key(source)
+    program = cache.load(key)
+    if program is None:
+        program = compile_source(source)
+        cache.store(key, program)
+    return program
 
-    parser = XMLParser(tree)
-    program = parser.parse()
 
-    execution = Execution(program, args, input_file)
-    execution.execute()
+if __name__ == '__main__':
+    source, args, input_file = parse_args()
+    program = load_program(source, args)
+    if args['optimize']:
+        optimizer = Optimizer(program)
+        program = optimizer.optimize()
+        if args['report_optimization']:
+            sys.stderr.write(optimizer.report(program))
+    if args['emit_binary'] is not None:
+        binary.write_file(program, args['emit_binary'])
+        exit(0)
+    if args['fusion']:
+        # Numbers of fusions are reported before the execution, so they need the whole program fused
+        program, fusions = fusion.fuse(program, eager=args['report_fusions'])
+        if args['report_fusions']:
+            sys.stderr.write(f"Fusions: {sum(fusions.values())} "
+                             + ", ".join(f"{name} {count}" for (name, count) in fusions.items()) + "\n")
+    if args['batch'] is not None:
+        batch.run_batch(program, args['source'], args['batch'], args['batch_output'], args['jobs'], args['run_timeout'],
+                        args['max_steps'], args['max_call_depth'])
+        exit(0)
+
+    stats = Stats(program, args['stats']) if args['stats'] else None
+    profiler = Profiler(program, args['profile'], args['profile_dump']) if args['profile'] else None
+    execution = Execution(program, args, input_file, stats=stats, profiler=profiler)
+    try:
+        execution.execute()
+    finally:
+        if stats is not None:
+            stats.write()
+        if profiler is not None:
+            profiler.write()
 
 
@@ -0,0 +1,87 @@
+# File: opcodes.py
+# Author: Maryia Mazurava
+
+
+# Numeric identifiers of the instructions, index into NAMES
+(MOVE, CREATEFRAME, PUSHFRAME, POPFRAME, DEFVAR, CALL, RETURN,
+ PUSHS, POPS, ADD, SUB, MUL, IDIV, LT, GT, EQ, AND, OR,
+ NOT, INT2CHAR, STRI2INT, READ, WRITE, CONCAT, STRLEN, GETCHAR,
+ SETCHAR, TYPE, LABEL, JUMP, JUMPIFEQ, JUMPIFNEQ, EXIT, DPRINT, BREAK,
+ CLEARS, ADDS, SUBS, MULS, IDIVS, LTS, GTS, EQS, ANDS, ORS, NOTS,
+ INT2CHARS, STRI2INTS, JUMPIFEQS, JUMPIFNEQS) = range(50)
+
+NAMES = ["MOVE", "CREATEFRAME", "PUSHFRAME", "POPFRAME", "DEFVAR", "CALL", "RETURN",
+         "PUSHS", "POPS", "ADD", "SUB", "MUL", "IDIV", "LT", "GT", "EQ", "AND", "OR",
+         "NOT", "INT2CHAR", "STRI2INT", "READ", "WRITE", "CONCAT", "STRLEN", "GETCHAR",
+         "SETCHAR", "TYPE", "LABEL", "JUMP", "JUMPIFEQ", "JUMPIFNEQ", "EXIT", "DPRINT", "BREAK",
+         "CLEARS", "ADDS", "SUBS", "MULS", "IDIVS", "LTS", "GTS", "EQS", "ANDS", "ORS", "NOTS",
+         "INT2CHARS", "STRI2INTS", "JUMPIFEQS", "JUMPIFNEQS"]
+
+IDS = {name: opcode for opcode, name in enumerate(NAMES)}
+
+# Instructions with the label operand pointing to the jump target
+JUMP_OPCODES = (CALL, JUMP, JUMPIFEQ, JUMPIFNEQ, JUMPIFEQS, JUMPIFNEQS)
+
+# Internal superinstructions created by fusion.py, numbered after the source instructions
+FUSED_NAMES = ["DEFVAR+MOVE", "ARITHMETIC+JUMPIF", "RELATION+JUMPIF", "PUSHS+PUSHS+POPS"]
+(DEFVAR_MOVE, ARITHMETIC_JUMPIF, RELATION_JUMPIF, PUSHS_PUSHS_POPS) = range(len(NAMES), len(NAMES) + len(FUSED_NAMES))
+ALL_NAMES = NAMES + FUSED_NAMES
+
+# Kinds of the operands expected by the instruction
+VAR = "var"
+SYMB = "symb"
+LABEL_NAME = "label"
+TYPE_NAME = "type"
+
+SIGNATURES = {
+    MOVE: (VAR, SYMB),
+    CREATEFRAME: (),
+    PUSHFRAME: (),
+    POPFRAME: (),
+    DEFVAR: (VAR,),
+    CALL: (LABEL_NAME,),
+    RETURN: (),
+    PUSHS: (SYMB,),
+    POPS: (VAR,),
+    ADD: (VAR, SYMB, SYMB),
+    SUB: (VAR, SYMB, SYMB),
+    MUL: (VAR, SYMB, SYMB),
+    IDIV: (VAR, SYMB, SYMB),
+    LT: (VAR, SYMB, SYMB),
+    GT: (VAR, SYMB, SYMB),
+    EQ: (VAR, SYMB, SYMB),
+    AND: (VAR, SYMB, SYMB),
+    OR: (VAR, SYMB, SYMB),
+    NOT: (VAR, SYMB),
+    INT2CHAR: (VAR, SYMB),
+    STRI2INT: (VAR, SYMB, SYMB),
+    READ: (VAR, TYPE_NAME),
+    WRITE: (SYMB,),
+    CONCAT: (VAR, SYMB, SYMB),
+    STRLEN: (VAR, SYMB),
+    GETCHAR: (VAR, SYMB, SYMB),
+    SETCHAR: (VAR, SYMB, SYMB),
+    TYPE: (VAR, SYMB),
+    LABEL: (LABEL_NAME,),
+    JUMP: (LABEL_NAME,),
+    JUMPIFEQ: (LABEL_NAME, SYMB, SYMB),
+    JUMPIFNEQ: (LABEL_NAME, SYMB, SYMB),
+    EXIT: (SYMB,),
+    DPRINT: (SYMB,),
+    BREAK: (),
+    CLEARS: (),
+    ADDS: (),
+    SUBS: (),
+    MULS: (),
+    IDIVS: (),
+    LTS: (),
+    GTS: (),
+    EQS: (),
+    ANDS: (),
+    ORS: (),
+    NOTS: (),
+    INT2CHARS: (),
+    STRI2INTS: (),
+    JUMPIFEQS: (LABEL_NAME,),
+    JUMPIFNEQS: (LABEL_NAME,),
+}
@@ -0,0 +1,167 @@
+# File: optimizer.py
+# Author: Maryia Mazurava
+
+
+from program import CompiledProgram
+from instruction import CompiledInstruction
+from cfg import ControlFlowGraph
+from compiler import GF_FRAME, VAR_OPERAND, CONST_OPERAND, LABEL_OPERAND
+from opcodes import *
+
+INT_TYPE = "int"
+BOOL_TYPE = "bool"
+STRING_TYPE = "string"
+NIL_TYPE = "nil"
+
+# Instructions computing the result only from their symbols
+FOLDED_OPCODES = frozenset({ADD, SUB, MUL, IDIV, LT, GT, EQ, AND, OR, NOT,
+                            INT2CHAR, STRI2INT, CONCAT, STRLEN, GETCHAR, TYPE})
+FRAME_OPCODES = frozenset({CREATEFRAME, PUSHFRAME, POPFRAME})
+# Instructions changing the variable given as the first operand
+WRITING_OPCODES = frozenset(opcode for opcode, signature in SIGNATURES.items()
+                            if signature and signature[0] == VAR)
+
+
+# Result of the instruction with constant symbols as (type, value), None when the instruction
+# fails at runtime, such errors are left to the execution
+def evaluate(opcode, symbols):
+    types = [symbol[1] for symbol in symbols]
+    values = [symbol[2] for symbol in symbols]
+
+    if opcode == TYPE:
+        return STRING_TYPE, types[0]
+    if opcode == NOT:
+        return (BOOL_TYPE, not values[0]) if types[0] == BOOL_TYPE else None
+    if opcode == STRLEN:
+        return (INT_TYPE, len(values[0])) if types[0] == STRING_TYPE else None
+    if opcode == INT2CHAR:
+        if types[0] != INT_TYPE or not 0 <= values[0] <= 0x10FFFF:
+            return None
+        return STRING_TYPE, chr(values[0])
+
+    (first, second) = values
+    if opcode in (ADD, SUB, MUL, IDIV):
+        if types != [INT_TYPE, INT_TYPE] or (opcode == IDIV and second == 0):
+            return None
+        if opcode == ADD:
+            return INT_TYPE, first + second
+        if opcode == SUB:
+            return INT_TYPE, first - second
+        if opcode == MUL:
+            return INT_TYPE, first * second
+        return INT_TYPE, first // second
+    if opcode in (LT, GT):
+        if NIL_TYPE in types or types[0] != types[1]:
+            return None
+        return BOOL_TYPE, first < second if opcode == LT else first > second
+    if opcode == EQ:
+        if NIL_TYPE in types:
+            return BOOL_TYPE, types[0] == types[1]
+        return (BOOL_TYPE, first == second) if types[0] == types[1] else None
+    if opcode in (AND, OR):
+        if types != [BOOL_TYPE, BOOL_TYPE]:
+            return None
+        return BOOL_TYPE, (first and second) if opcode == AND else (first or second)
+    if opcode == CONCAT:
+        return (STRING_TYPE, first + second) if types == [STRING_TYPE, STRING_TYPE] else None
+
+    # STRI2INT and GETCHAR
+    if types != [STRING_TYPE, INT_TYPE] or not 0 <= second < len(first):
+        return None
+    if opcode == STRI2INT:
+        return INT_TYPE, ord(first[second])
+    return STRING_TYPE, first[second]
+
+
+# Class representing the optimization of the compiled program. Variables with the constant
+# set by MOVE in the basic block are replaced by the constant until the variable or its frame
+# changes, constant instructions become MOVE, a MOVE of the constant overwritten by the next one
+# and unreachable blocks are removed. Runtime errors are never folded away.
+class Optimizer:
+    def __init__(self, program: CompiledProgram):
+        self.program = program
+        self.cfg = ControlFlowGraph(program)
+        self.propagated = 0
+        self.folded = 0
+        self.overwritten = 0
+        self.unreachable = 0
+
+    # Returns the optimized program, the original one is not changed
+    def optimize(self):
+        reachable = self.cfg.reachable()
+        instructions = []
+        for block in self.cfg.blocks:
+            if block.number in reachable:
+                instructions += self.optimize_block(block)
+            else:
+                self.unreachable += block.end - block.start
+        return self.link(instructions)
+
+    def optimize_block(self, block):
+        known = {}
+        result = []
+        # Mapped binary programs are indexed one by one, they can't be sliced
+        for index in range(block.start, block.end):
+            instruction = self.program.instructions[index]
+            opcode = instruction.opcode
+            operands = self.propagate(instruction, known)
+            if opcode in FOLDED_OPCODES and all(operand[0] == CONST_OPERAND for operand in operands[1:]):
+                value = evaluate(opcode, operands[1:])
+                if value is not None:
+                    (opcode, operands) = (MOVE, (operands[0], (CONST_OPERAND,) + value))
+                    self.folded += 1
+            result.append(CompiledInstruction(instruction.order, opcode, operands))
+
+            if opcode == MOVE and operands[1][0] == CONST_OPERAND:
+                known[operands[0][1:]] = operands[1]
+            elif opcode in WRITING_OPCODES:
+                known.pop(operands[0][1:], None)
+            elif opcode in FRAME_OPCODES:
+                # Temporary and local frames are replaced, only the global one stays
+                known = {key: value for (key, value) in known.items() if key[0] == GF_FRAME}
+
+        # MOVE of the constant immediately overwritten by another one has no effect
+        kept = []
+        for (index, instruction) in enumerate(result):
+            following = result[index + 1] if index + 1 < len(result) else None
+            if (instruction.opcode == MOVE and instruction.operands[1][0] == CONST_OPERAND
+                    and following is not None and following.opcode == MOVE
+                    and following.operands[1][0] == CONST_OPERAND
+                    and following.operands[0] == instruction.operands[0]):
+                self.overwritten += 1
+                continue
+            kept.append(instruction)
+        return kept
+
+    # Symbols reading the variable with the known constant are replaced by it
+    def propagate(self, instruction, known):
+        if not known:
+            return instruction.operands
+        operands = []
+        for (kind, operand) in zip(SIGNATURES[instruction.opcode], instruction.operands):
+            if kind == SYMB and operand[0] == VAR_OPERAND and operand[1:] in known:
+                operand = known[operand[1:]]
+                self.propagated += 1
+            operands.append(operand)
+        return tuple(operands)
+
+    # Label operands point to the new indices of the LABEL instructions
+    def link(self, instructions):
+        targets = {}
+        for (index, instruction) in enumerate(instructions):
+            instruction.index = index
+            if instruction.opcode == LABEL:
+                targets[instruction.operands[0][1]] = index
+        for instruction in instructions:
+            if instruction.opcode in JUMP_OPCODES:
+                name = instruction.operands[0][1]
+                instruction.operands = ((LABEL_OPERAND, name, targets[name]),) + instruction.operands[1:]
+        return CompiledProgram(instructions, self.program.global_names, self.program.local_names)
+
+    def report(self, optimized):
+        before = len(self.program.instructions)
+        after = len(optimized.instructions)
+        percent = 100 * (before - after) / before if before else 0
+        return (f"Optimization: {before} -> {after} instructions (-{before - after}, {percent:.1f}%), "
+                f"folded {self.folded}, propagated {self.propagated}, "
+                f"overwritten moves {self.overwritten}, unreachable {self.unreachable}\n")
@@ -0,0 +1,46 @@
+# File: output.py
+# Author: Maryia Mazurava
+
+
+import os
+import sys
+
+BUFFER_LIMIT = 64 * 1024
+
+
+# Checks if both streams end up in the same file or terminal
+def same_target(first, second):
+    try:
+        first_stat = os.fstat(first.fileno())
+        second_stat = os.fstat(second.fileno())
+    except (AttributeError, OSError, ValueError):
+        return False
+    return (first_stat.st_dev, first_stat.st_ino) == (second_stat.st_dev, second_stat.st_ino)
+
+
+# Buffered output of the interpreted program, written to the stream in large blocks
+class Output:
+    def __init__(self, stream=None, limit=BUFFER_LIMIT):
+        self.stream = sys.stdout if stream is None else stream
+        self.limit = limit
+        self.parts = []
+        self.size = 0
+        self.shares_stderr = same_target(self.stream, sys.stderr)
+
+    def write(self, text):
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.limit:
+            self.flush()
+
+    def flush(self):
+        if self.parts:
+            self.stream.write("".join(self.parts))
+            self.parts.clear()
+            self.size = 0
+        self.stream.flush()
+
+    # Keeps order of the output and messages on stderr when they go to the same place
+    def before_stderr(self):
+        if self.shares_stderr:
+            self.flush()
@@ -2,31 +2,89 @@
 # Author: Maryia Mazurava
 
 
-from xml.etree.ElementTree import ElementTree, Element
+from xml.etree.ElementTree import Element
+import xml.etree.ElementTree as ET
+import re
 from errors import *
 import errors as E
 from argument import Argument
 from instruction import Instruction
 from program import Program
+from reader import parse_int
+import opcodes as O
 
 OPCODE_ATTRIBUTE = "opcode"
 ORDER_ATTRIBUTE = "order"
 TYPE_ATTRIBUTE = "type"
+ESCAPE_SEQUENCE = re.compile(r"\\(\d{3})")
 
-# Class representing parser of the XML code
+# Class representing parser of the XML code, the document is read as a stream
+# and every instruction is passed to the convert function as soon as it is complete
 class XMLParser:
-    labels = {}
-    opcodes = ["MOVE", "CREATEFRAME", "PUSHFRAME", "POPFRAME", "DEFVAR", "CALL", "RETURN",
-               "PUSHS", "POPS", "ADD", "SUB", "MUL", "IDIV", "LT", "GT", "EQ", "AND", "OR",
-               "NOT", "INT2CHAR", "STRI2INT", "READ", "WRITE", "CONCAT", "STRLEN", "GETCHAR",
-               "SETCHAR", "TYPE", "LABEL", "JUMP", "JUMPIFEQ", "JUMPIFNEQ", "EXIT", "DPRINT", "BREAK"]
+    opcodes = O.IDS
+
+    def __init__(self, source, convert=None):
+        self.source = source
+        self.convert = convert
+        # Label name -> order of the LABEL instruction
+        self.labels = {}
+        # Pool of the arguments, (type, text) -> the Argument shared by all its occurrences
+        self.constants = {}
+
+    # Method to parse whole program. The first structural or semantic error is reported
+    # only after the whole document is read, so malformed XML takes priority as before streaming.
+    def parse(self):
+        root = None
+        depth = 0
+        orders = set()
+        parsed = []
+        first_error = None
+        E.deferred = True
+        try:
+            for event, element in ET.iterparse(self.source, events=("start", "end")):
+                if event == "start":
+                    depth += 1
+                    if depth == 1:
+                        root = element
+                        try:
+                            self.check_root(root)
+                        except E.DeferredError as error:
+                            first_error = error
+                    continue
+
+                depth -= 1
+                if depth != 1:
+                    continue
+
+                # After the error the rest of the document is only checked to be well-formed
+                if first_error is None:
+                    try:
+                        (order, instruction) = self.parse_element(element, orders)
+                        if self.convert is not None:
+                            instruction = self.convert(instruction)
+                        parsed.append((order, instruction))
+                    except E.DeferredError as error:
+                        first_error = error
+                # Instruction is converted, its subtree is no longer needed
+                root.clear()
+        except ET.ParseError:
+            E.deferred = False
+            E.error_exit("Error: parse error.\n", FORMAT_ERROR)
+        finally:
+            E.deferred = False
+
+        if first_error is not None:
+            E.error_exit(first_error.message, first_error.error)
+
+        # Orders are unique but may have gaps, sorting makes them dense indices
+        parsed.sort(key=lambda pair: pair[0])
+        instructions = [instruction for (order, instruction) in parsed]
 
-    def __init__(self, tree: ElementTree):
-        self.tree = tree
+        return Program(instructions, self.labels)
 
-    # Method to parse whole program
-    def parse(self):
-        root = self.tree.getroot()
+    # Checks the root element, called before its content is read
+    @staticmethod
+    def check_root(root: Element):
         if root.tag != "program":
             E.error_exit('Error: XML file has wrong structure.\n', STRUCTURE_ERROR)
 
@@ -48,38 +106,25 @@ class XMLParser:
         if len(root.attrib) != number_of_attributes:
             E.error_exit("Error: invalid attributes of 'program' tag.\n", STRUCTURE_ERROR)
 
-        check_duplicates = []
-        instructions = [""] * len(root)
-        for element in root:
-            if element.tag != 'instruction':
-                E.error_exit("Error: wrong name of the element 'instruction'.\n", STRUCTURE_ERROR)
-            if ORDER_ATTRIBUTE not in element.attrib or OPCODE_ATTRIBUTE not in element.attrib:
-                E.error_exit("Error: needed attribute 'order' or 'opcode' is missing.\n", STRUCTURE_ERROR)
-
-            if not element.attrib[ORDER_ATTRIBUTE].isnumeric() or int(element.attrib[ORDER_ATTRIBUTE]) <= 0:
-                E.error_exit("Error: invalid order value.\n", STRUCTURE_ERROR)
+    # Checks one child element of the root and returns the parsed instruction with it's order
+    def parse_element(self, element: Element, orders):
+        if element.tag != 'instruction':
+            E.error_exit("Error: wrong name of the element 'instruction'.\n", STRUCTURE_ERROR)
+        if ORDER_ATTRIBUTE not in element.attrib or OPCODE_ATTRIBUTE not in element.attrib:
+            E.error_exit("Error: needed attribute 'order' or 'opcode' is missing.\n", STRUCTURE_ERROR)
 
-            if element.attrib[ORDER_ATTRIBUTE] in check_duplicates:
-                E.error_exit("Error: wrong order.\n", STRUCTURE_ERROR)
-            else:
-                check_duplicates.append(element.attrib[ORDER_ATTRIBUTE])
-
-            if element.attrib[OPCODE_ATTRIBUTE].upper() not in self.opcodes:
-                E.error_exit("Error: wrong opcode.\n", STRUCTURE_ERROR)
+        if not element.attrib[ORDER_ATTRIBUTE].isnumeric() or int(element.attrib[ORDER_ATTRIBUTE]) <= 0:
+            E.error_exit("Error: invalid order value.\n", STRUCTURE_ERROR)
 
-            (order, instruction) = self.parse_instruction(element)
-            if order < 1:
-                E.error_exit("Error: order must start from 1.\n", STRUCTURE_ERROR)
+        if element.attrib[OPCODE_ATTRIBUTE].upper() not in self.opcodes:
+            E.error_exit("Error: wrong opcode.\n", STRUCTURE_ERROR)
 
-            if order > len(instructions):
-                E.error_exit("Error: wrong order.", STRUCTURE_ERROR)
+        (order, instruction) = self.parse_instruction(element)
+        if order in orders:
+            E.error_exit("Error: wrong order.\n", STRUCTURE_ERROR)
+        orders.add(order)
 
-            # Inserting instruction object to the position in the list according to the order
-            if order - 1 < len(instructions) and instructions[order - 1] == "":
-                instructions.insert(order-1, instruction)
-                del instructions[order]
-
-        return Program(instructions, self.labels)
+        return order, instruction
 
     # Parses one instruction and returns object of class Instruction and it's order
     def parse_instruction(self, element: Element):
@@ -113,11 +158,12 @@ class XMLParser:
             if argument.value in self.labels:
                 E.error_exit("Error: repeated definition of the label.\n", SEMANTIC_ERROR)
             else:
-                self.labels[argument.value] = element.attrib[ORDER_ATTRIBUTE]
+                self.labels[argument.value] = instruction_order
 
         return instruction_order, Instruction(instruction_order, opcode, arguments)
 
-    # Parse one argument and returns object of Argument class and order of the argument
+    # Parse one argument and returns object of Argument class and order of the argument,
+    # the literal is converted only at its first occurrence
     def parse_argument(self, argument: Element):
         value = argument.text
         if value is not None:
@@ -129,4 +175,31 @@ class XMLParser:
             E.error_exit("Error: wrong name of the element 'arg'.\n", STRUCTURE_ERROR)
         arg_type = argument.attrib[TYPE_ATTRIBUTE]
 
-        return int(order), Argument(arg_type, value)
+        constant = self.constants.get((arg_type, value))
+        if constant is None:
+            constant = Argument(arg_type, self.convert_literal(arg_type, value))
+            self.constants[(arg_type, value)] = constant
+        return int(order), constant
+
+    # Converts text of the literal to the native value: int, bool, str or None for nil
+    @staticmethod
+    def convert_literal(arg_type, value):
+        if arg_type == "int":
+            # Same form as the int read by READ
+            number = None if value is None else parse_int(value)
+            if number is None:
+                E.error_exit("Error: invalid int literal.\n", STRUCTURE_ERROR)
+            return number
+        elif arg_type == "bool":
+            if value not in ["true", "false"]:
+                E.error_exit("Error: invalid bool literal.\n", STRUCTURE_ERROR)
+            return value == "true"
+        elif arg_type == "nil":
+            if value != "nil":
+                E.error_exit("Error: invalid nil literal.\n", STRUCTURE_ERROR)
+            return None
+        elif arg_type == "string":
+            if value is None:
+                return ""
+            return ESCAPE_SEQUENCE.sub(lambda match: chr(int(match.group(1))), value)
+        return value
@@ -0,0 +1,118 @@
+# File: profiler.py
+# Author: Maryia Mazurava
+
+
+import csv
+import json
+import time
+from errors import *
+import errors as E
+from opcodes import *
+from cfg import ControlFlowGraph
+
+MAIN_NAME = "<main>"
+
+
+# Wall time and hits of every instruction, basic blocks and calls between the functions
+class Profiler:
+    def __init__(self, program, report_file, dump_file=None):
+        self.program = program
+        self.report_file = report_file
+        self.dump_file = dump_file
+        # Indexed like program instructions, times are in nanoseconds
+        self.hits = [0] * len(program.instructions)
+        self.times = [0] * len(program.instructions)
+        # Active calls as (function, caller, start time), function is the label of CALL
+        self.calls = []
+        # (caller, function) -> [number of calls, inclusive time]
+        self.call_graph = {}
+        # (caller, function) -> number of its active calls, only the outermost one adds the inclusive
+        # time, so the recursive calls nested in it are not counted twice
+        self.active = {}
+        self.cfg = ControlFlowGraph(program)
+
+    def enter(self, instruction):
+        caller = self.calls[-1][0] if self.calls else MAIN_NAME
+        function = instruction.operands[0][1]
+        self.active[(caller, function)] = self.active.get((caller, function), 0) + 1
+        self.calls.append((function, caller, time.perf_counter_ns()))
+
+    def leave(self):
+        if not self.calls:
+            return
+        (function, caller, start) = self.calls.pop()
+        edge = self.call_graph.setdefault((caller, function), [0, 0])
+        edge[0] += 1
+        self.active[(caller, function)] -= 1
+        if self.active[(caller, function)] == 0:
+            edge[1] += time.perf_counter_ns() - start
+
+    def instruction_rows(self):
+        rows = []
+        for (index, instruction) in enumerate(self.program.instructions):
+            if self.hits[index] > 0:
+                rows.append((instruction.order, NAMES[instruction.opcode], self.hits[index], self.times[index]))
+        return sorted(rows, key=lambda row: (-row[3], row[0]))
+
+    # Block hits are the executions of its first instruction, blocks come from the control-flow graph
+    def block_rows(self):
+        rows = []
+        for block in self.cfg.blocks:
+            hits = self.hits[block.start]
+            total = sum(self.times[block.start:block.end])
+            if hits > 0 or total > 0:
+                rows.append((block.name, hits, total))
+        return sorted(rows, key=lambda row: (-row[2], row[0]))
+
+    def call_rows(self):
+        return sorted(((caller, function, calls, total) for ((caller, function), (calls, total)) in self.call_graph.items()),
+                      key=lambda row: (-row[3], row[0], row[1]))
+
+    def report(self):
+        total = sum(self.times) or 1
+        lines = ["Instructions by time:",
+                 f"{'order':>8} {'opcode':<12} {'hits':>10} {'time ms':>12} {'per hit us':>12} {'%':>7}"]
+        for (order, opcode, hits, spent) in self.instruction_rows():
+            lines.append(f"{order:>8} {opcode:<12} {hits:>10} {spent / 1e6:>12.3f} {spent / hits / 1e3:>12.3f} {100 * spent / total:>6.2f}%")
+
+        lines += ["", "Blocks by time:", f"{'label':<24} {'hits':>10} {'time ms':>12} {'%':>7}"]
+        for (name, hits, spent) in self.block_rows():
+            lines.append(f"{name:<24} {hits:>10} {spent / 1e6:>12.3f} {100 * spent / total:>6.2f}%")
+
+        lines += ["", "Call graph:", f"{'caller':<24} {'function':<24} {'calls':>10} {'inclusive ms':>14}"]
+        for (caller, function, calls, spent) in self.call_rows():
+            lines.append(f"{caller:<24} {function:<24} {calls:>10} {spent / 1e6:>14.3f}")
+        return "\n".join(lines) + "\n"
+
+    # Machine readable dump, CSV for the .csv file, JSON otherwise
+    def dump(self, file):
+        if file.endswith(".csv"):
+            with open(file, "w", newline="") as dump_file:
+                writer = csv.writer(dump_file)
+                writer.writerow(["kind", "name", "order", "opcode", "hits", "time_ns"])
+                for (order, opcode, hits, spent) in self.instruction_rows():
+                    writer.writerow(["instruction", "", order, opcode, hits, spent])
+                for (name, hits, spent) in self.block_rows():
+                    writer.writerow(["block", name, "", "", hits, spent])
+                for (caller, function, calls, spent) in self.call_rows():
+                    writer.writerow(["call", caller + "->" + function, "", "", calls, spent])
+            return
+
+        data = {
+            "instructions": [{"order": order, "opcode": opcode, "hits": hits, "time_ns": spent}
+                             for (order, opcode, hits, spent) in self.instruction_rows()],
+            "blocks": [{"label": name, "hits": hits, "time_ns": spent} for (name, hits, spent) in self.block_rows()],
+            "calls": [{"caller": caller, "function": function, "calls": calls, "time_ns": spent}
+                      for (caller, function, calls, spent) in self.call_rows()],
+        }
+        with open(file, "w") as dump_file:
+            json.dump(data, dump_file, indent=1)
+
+    def write(self):
+        try:
+            with open(self.report_file, "w") as report_file:
+                report_file.write(self.report())
+            if self.dump_file is not None:
+                self.dump(self.dump_file)
+        except OSError:
+            E.error_exit("Error: can't write profile.\n", OUTPUT_ERROR)
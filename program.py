@@ -6,3 +6,11 @@ class Program:
     def __init__(self, instructions, labels):
         self.instructions = instructions
         self.labels = labels
+
+
+# Program prepared for the execution, variable names are indexed by the variable slots
+class CompiledProgram:
+    def __init__(self, instructions, global_names, local_names):
+        self.instructions = instructions
+        self.global_names = global_names
+        self.local_names = local_names
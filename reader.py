@@ -0,0 +1,93 @@
+# File: reader.py
+# Author: Maryia Mazurava
+
+
+import re
+
+# Size of one bulk read of the input
+CHUNK_SIZE = 1 << 20
+
+INT_TYPE = "int"
+BOOL_TYPE = "bool"
+STRING_TYPE = "string"
+NIL_TYPE = "nil"
+
+# Integer in the IPPcode23 form: optional minus and decimal, 0x hexadecimal or 0o octal digits
+INT_FORMAT = re.compile(r"-?(?:0[xX](?P<hex>[0-9a-fA-F]+)|0[oO](?P<oct>[0-7]+)|(?P<dec>[0-9]+))")
+
+
+# Value of the integer in the IPPcode23 form, None for other text
+def parse_int(text):
+    # Plain decimal digits are the common case
+    if text.isdigit() and text.isascii():
+        return int(text)
+    match = INT_FORMAT.fullmatch(text)
+    if match is None:
+        return None
+    if match["hex"] is not None:
+        value = int(match["hex"], 16)
+    elif match["oct"] is not None:
+        value = int(match["oct"], 8)
+    else:
+        value = int(match["dec"])
+    return -value if text.startswith("-") else value
+
+
+# Class representing input of the READ instruction. The input is read in big chunks which
+# are split to lines at once, so one READ only takes the next line of the list.
+# Interactive input is read line by line to not wait for more than the program asks for.
+class InputReader:
+    def __init__(self, stream, interactive=False):
+        self.stream = stream
+        self.interactive = interactive
+        self.lines = []
+        self.position = 0
+        # Incomplete last line of the chunk
+        self.rest = ""
+        self.eof = False
+
+    # Returns the next line without the end of line, None after the end of the input
+    def read_line(self):
+        if self.position < len(self.lines):
+            line = self.lines[self.position]
+            self.position += 1
+            return line
+        return self.next_chunk()
+
+    def next_chunk(self):
+        if self.interactive:
+            line = self.stream.readline()
+            return line[:-1] if line.endswith("\n") else (line or None)
+
+        while not self.eof:
+            chunk = self.stream.read(CHUNK_SIZE)
+            if chunk == "":
+                self.eof = True
+                break
+            lines = (self.rest + chunk).split("\n")
+            self.rest = lines.pop()
+            if lines:
+                self.lines = lines
+                self.position = 1
+                return lines[0]
+
+        # Last line without the end of line
+        self.lines = []
+        self.position = 0
+        line = self.rest or None
+        self.rest = ""
+        return line
+
+    # Reads the value of the type, nil when the input ended or the int is malformed
+    def read(self, value_type):
+        line = self.read_line()
+        if line is None:
+            return NIL_TYPE, None
+        if value_type == INT_TYPE:
+            value = parse_int(line)
+            if value is None:
+                return NIL_TYPE, None
+            return INT_TYPE, value
+        if value_type == BOOL_TYPE:
+            return BOOL_TYPE, line.strip().lower() == "true"
+        return STRING_TYPE, line
@@ -0,0 +1,37 @@
+# File: stack.py
+# Author: Maryia Mazurava
+
+
+from errors import *
+import errors as E
+
+# Default limit of the depth of the calls and of the local frames
+MAX_DEPTH = 1000000
+
+
+# Class representing the list used as the stack with the limited depth, only push checks the limit
+class BoundedStack(list):
+    kind = "stack"
+
+    def __init__(self, limit=MAX_DEPTH):
+        super().__init__()
+        self.limit = limit
+
+    def push(self, item):
+        if len(self) >= self.limit:
+            E.error_exit(f"Error: maximum depth of {self.limit} {self.kind} exceeded.\n", LIMIT_ERROR)
+        self.append(item)
+
+    # Top item, None for the empty stack
+    def top(self):
+        return self[-1] if self else None
+
+
+# Stack of the local frames, LF is the top one
+class FrameStack(BoundedStack):
+    kind = "local frames"
+
+
+# Stack of the indices of the instructions following CALL
+class CallStack(BoundedStack):
+    kind = "calls"
@@ -0,0 +1,93 @@
+# File: stats.py
+# Author: Maryia Mazurava
+
+
+from errors import *
+import errors as E
+from frame import defined_variables
+from opcodes import *
+
+STATS_OPTIONS = ["--insts", "--hot", "--vars", "--frequent", "--opcodes", "--eol"]
+
+# Instructions that are not counted as executed
+NOT_COUNTED = [LABEL, DPRINT, BREAK]
+
+
+# Number of variables with a value in the frame
+def count_initialized(frame):
+    if frame is None:
+        return 0
+    return sum(1 for (slot, variable) in defined_variables(frame) if variable is not None)
+
+
+# Counters collected during the execution, they are written by the groups of --stats options
+class Stats:
+    def __init__(self, program, groups):
+        self.program = program
+        self.groups = groups
+        # Executions of every instruction, indexed like program instructions
+        self.counts = [0] * len(program.instructions)
+        self.track_vars = any(option == "--vars" for (file, options) in groups for option in options)
+        self.initialized = 0
+        self.max_vars = 0
+
+    def variable_initialized(self):
+        self.initialized += 1
+        if self.initialized > self.max_vars:
+            self.max_vars = self.initialized
+
+    def frame_dropped(self, frame):
+        self.initialized -= count_initialized(frame)
+
+    def executed_instructions(self):
+        return sum(count for (instruction, count) in zip(self.program.instructions, self.counts)
+                   if instruction.opcode not in NOT_COUNTED)
+
+    # Order of the most executed instruction, the lowest order wins when counts are equal
+    def hot_instruction(self):
+        hot = None
+        for (instruction, count) in zip(self.program.instructions, self.counts):
+            if instruction.opcode in NOT_COUNTED or count == 0:
+                continue
+            if hot is None or count > hot[0] or (count == hot[0] and instruction.order < hot[1]):
+                hot = (count, instruction.order)
+        return "" if hot is None else str(hot[1])
+
+    # Executions of every opcode, the most executed first
+    def opcode_counts(self):
+        counts = {}
+        for (instruction, count) in zip(self.program.instructions, self.counts):
+            if count > 0 and instruction.opcode not in NOT_COUNTED:
+                counts[instruction.opcode] = counts.get(instruction.opcode, 0) + count
+        return sorted(counts.items(), key=lambda item: (-item[1], NAMES[item[0]]))
+
+    def frequent_opcodes(self):
+        counts = self.opcode_counts()
+        if not counts:
+            return ""
+        return ",".join(NAMES[opcode] for (opcode, count) in counts if count == counts[0][1])
+
+    def statistic(self, option):
+        if option == "--insts":
+            return str(self.executed_instructions())
+        if option == "--hot":
+            return self.hot_instruction()
+        if option == "--vars":
+            return str(self.max_vars)
+        if option == "--frequent":
+            return self.frequent_opcodes()
+        if option == "--opcodes":
+            return ",".join(NAMES[opcode] + ":" + str(count) for (opcode, count) in self.opcode_counts())
+        if option == "--eol":
+            return "\n"
+        # --print=string
+        return option.split("=", 1)[1]
+
+    # Writes statistics to the files in the order of the options
+    def write(self):
+        for (file, options) in self.groups:
+            try:
+                with open(file, "w") as stats_file:
+                    stats_file.write("".join(self.statistic(option) for option in options))
+            except OSError:
+                E.error_exit("Error: can't write statistics.\n", OUTPUT_ERROR)
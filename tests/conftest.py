@@ -0,0 +1,9 @@
+# File: tests/conftest.py
+# Author: Maryia Mazurava
+
+
+import os
+import sys
+
+# Modules of the interpreter are in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
@@ -0,0 +1,110 @@
+# File: tests/test_batch.py
+# Author: Maryia Mazurava
+#
+# Runs of one batch must not see the state left by the previous runs of the same process.
+
+
+import io
+import json
+import os
+
+import pytest
+
+from batch import run_batch, MANIFEST_FILE
+from interpret import compile_source
+
+# Word runs write the word twice and exit inside a call with GF, the data stack, the call
+# stack, LF and TF all changed. Probe runs fail on the clean state and print "leaked" otherwise.
+# The recursion run calls itself until it reaches the call depth limit of the batch.
+PROGRAM = """<?xml version="1.0" encoding="UTF-8"?>
+<program language="IPPcode23">
+ <instruction order="1" opcode="DEFVAR"><arg1 type="var">GF@word</arg1></instruction>
+ <instruction order="2" opcode="READ"><arg1 type="var">GF@word</arg1><arg2 type="type">string</arg2></instruction>
+ <instruction order="3" opcode="JUMPIFEQ"><arg1 type="label">stack</arg1><arg2 type="var">GF@word</arg2><arg3 type="string">stack</arg3></instruction>
+ <instruction order="4" opcode="JUMPIFEQ"><arg1 type="label">frames</arg1><arg2 type="var">GF@word</arg2><arg3 type="string">frames</arg3></instruction>
+ <instruction order="5" opcode="JUMPIFEQ"><arg1 type="label">temporary</arg1><arg2 type="var">GF@word</arg2><arg3 type="string">temporary</arg3></instruction>
+ <instruction order="6" opcode="JUMPIFEQ"><arg1 type="label">calls</arg1><arg2 type="var">GF@word</arg2><arg3 type="string">calls</arg3></instruction>
+ <instruction order="7" opcode="JUMPIFEQ"><arg1 type="label">recursion</arg1><arg2 type="var">GF@word</arg2><arg3 type="string">recursion</arg3></instruction>
+ <instruction order="8" opcode="WRITE"><arg1 type="var">GF@word</arg1></instruction>
+ <instruction order="9" opcode="PUSHS"><arg1 type="var">GF@word</arg1></instruction>
+ <instruction order="10" opcode="CREATEFRAME"></instruction>
+ <instruction order="11" opcode="DEFVAR"><arg1 type="var">TF@copy</arg1></instruction>
+ <instruction order="12" opcode="MOVE"><arg1 type="var">TF@copy</arg1><arg2 type="var">GF@word</arg2></instruction>
+ <instruction order="13" opcode="PUSHFRAME"></instruction>
+ <instruction order="14" opcode="CREATEFRAME"></instruction>
+ <instruction order="15" opcode="DEFVAR"><arg1 type="var">TF@next</arg1></instruction>
+ <instruction order="16" opcode="CALL"><arg1 type="label">function</arg1></instruction>
+ <instruction order="17" opcode="LABEL"><arg1 type="label">function</arg1></instruction>
+ <instruction order="18" opcode="WRITE"><arg1 type="var">LF@copy</arg1></instruction>
+ <instruction order="19" opcode="EXIT"><arg1 type="int">0</arg1></instruction>
+ <instruction order="20" opcode="LABEL"><arg1 type="label">stack</arg1></instruction>
+ <instruction order="21" opcode="POPS"><arg1 type="var">GF@word</arg1></instruction>
+ <instruction order="22" opcode="JUMP"><arg1 type="label">leaked</arg1></instruction>
+ <instruction order="23" opcode="LABEL"><arg1 type="label">frames</arg1></instruction>
+ <instruction order="24" opcode="POPFRAME"></instruction>
+ <instruction order="25" opcode="JUMP"><arg1 type="label">leaked</arg1></instruction>
+ <instruction order="26" opcode="LABEL"><arg1 type="label">temporary</arg1></instruction>
+ <instruction order="27" opcode="DEFVAR"><arg1 type="var">TF@next</arg1></instruction>
+ <instruction order="28" opcode="JUMP"><arg1 type="label">leaked</arg1></instruction>
+ <instruction order="29" opcode="LABEL"><arg1 type="label">calls</arg1></instruction>
+ <instruction order="30" opcode="RETURN"></instruction>
+ <instruction order="31" opcode="LABEL"><arg1 type="label">recursion</arg1></instruction>
+ <instruction order="32" opcode="CALL"><arg1 type="label">recursion</arg1></instruction>
+ <instruction order="33" opcode="LABEL"><arg1 type="label">leaked</arg1></instruction>
+ <instruction order="34" opcode="WRITE"><arg1 type="string">leaked</arg1></instruction>
+</program>
+"""
+
+# Input word -> expected stdout, stderr and exit code
+EXPECTED = {
+    "alpha": ("alphaalpha", "", 0),
+    "stack": ("", "Error: stack is empty.\n", 56),
+    "beta": ("betabeta", "", 0),
+    "frames": ("", "Error: frame is empty.\n", 55),
+    "gamma": ("gammagamma", "", 0),
+    "temporary": ("", "Error: frame doesn't exist.\n", 55),
+    "delta": ("deltadelta", "", 0),
+    "calls": ("", "Error: nowhere to return.\n", 56),
+    "epsilon": ("epsilonepsilon", "", 0),
+    "recursion": ("", "Error: maximum depth of 100 calls exceeded.\n", 60),
+}
+
+
+def read(path):
+    with open(path) as file:
+        return file.read()
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_runs_are_isolated(tmp_path, jobs):
+    program = compile_source(io.BytesIO(PROGRAM.encode()))
+    words = list(EXPECTED)
+    inputs = []
+    for (number, word) in enumerate(words):
+        path = tmp_path / f"input{number}.txt"
+        path.write_text(word + "\n")
+        inputs.append(str(path))
+    list_path = tmp_path / "inputs.txt"
+    list_path.write_text("\n".join(inputs) + "\n")
+    output_dir = str(tmp_path / "output")
+
+    runs = run_batch(program, "program.xml", str(list_path), output_dir, jobs, max_call_depth=100)
+
+    assert [run["input"] for run in runs] == inputs
+    for (word, run) in zip(words, runs):
+        (stdout, stderr, exit_code) = EXPECTED[word]
+        assert read(run["stdout"]) == stdout
+        assert read(run["stderr"]) == stderr
+        assert run["exit_code"] == exit_code
+
+    with open(os.path.join(output_dir, MANIFEST_FILE)) as file:
+        manifest = json.load(file)
+    assert manifest["source"] == "program.xml"
+    assert manifest["runs"] == runs
+    assert [os.path.basename(run["stdout"]) for run in manifest["runs"]] == [f"{number:06d}.out" for number in range(1, 11)]
+    assert [os.path.basename(run["stderr"]) for run in manifest["runs"]] == [f"{number:06d}.err" for number in range(1, 11)]
+    summary = manifest["summary"]
+    assert summary["total"] == 10
+    assert summary["succeeded"] == 5
+    assert summary["exit_codes"] == {"0": 5, "56": 2, "55": 2, "60": 1}
+    assert summary["time_s"] == pytest.approx(sum(run["time_s"] for run in runs), abs=1e-5)
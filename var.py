@@ -2,7 +2,35 @@
 # Author: Maryia Mazurava
 
 
+# Value is native: int, bool, str or None for nil
 class Variable:
+    __slots__ = ("value", "var_type")
+
     def __init__(self, var_type, value):
         self.value = value
         self.var_type = var_type
+
+
+# String variable kept as a list of characters for CONCAT and SETCHAR changing it in place,
+# the value is joined only when it is read and kept until the next change
+class StringBuilder(Variable):
+    __slots__ = ("chars", "text")
+
+    def __init__(self, text):
+        self.var_type = "string"
+        self.chars = list(text)
+        self.text = text
+
+    @property
+    def value(self):
+        if self.text is None:
+            self.text = "".join(self.chars)
+        return self.text
+
+    def append(self, text):
+        self.chars.extend(text)
+        self.text = None
+
+    def set_char(self, index, char):
+        self.chars[index] = char
+        self.text = None